@@ -0,0 +1,157 @@
+"""Query plans and latencies for the hot appointment queries, before and after indexing.
+
+Builds a throwaway database with the pre-index schema (migrations 1–2),
+fills it with synthetic patients and appointments, times each hot query,
+then applies the remaining migrations and times them again.
+
+    uv run python benchmarks/bench_indexes.py              # 1M appointments
+    uv run python benchmarks/bench_indexes.py --rows 200000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import aiosqlite
+
+from dental_receptionist.migrations import SCHEMA_VERSION, migrate
+
+SERVICES = ["cleaning", "checkup", "filling", "extraction", "whitening", "emergency"]
+TIMES = [f"{m // 60:02d}:{m % 60:02d}" for m in range(9 * 60, 17 * 60, 30)]
+START = date(2020, 1, 1)
+
+# Same SQL as the corresponding helpers in database.py.
+QUERIES = {
+    "get_slots": (
+        "SELECT time, service FROM appointments WHERE date = ? AND status = 'confirmed'",
+        lambda rnd, n: ((START + timedelta(days=rnd.randrange(n))).isoformat(),),
+    ),
+    "create_appointment(patient)": (
+        "SELECT id FROM patients WHERE phone = ?",
+        lambda rnd, n: (f"03{rnd.randrange(n):09d}",),
+    ),
+    "get_patient_appointments": (
+        """SELECT a.id, a.service, a.date, a.time, a.status
+           FROM appointments a
+           JOIN patients p ON a.patient_id = p.id
+           WHERE p.name LIKE ? AND p.phone = ?
+           ORDER BY a.date, a.time""",
+        lambda rnd, n: ("%Patient%", f"03{rnd.randrange(n):09d}"),
+    ),
+    "get_pending_24h_reminders": (
+        """SELECT a.id, a.service, a.date, a.time, p.name, p.phone, p.email
+           FROM appointments a
+           JOIN patients p ON a.patient_id = p.id
+           WHERE a.status = 'confirmed'
+             AND a.reminder_24h_sent = 0
+             AND a.date = date(?, '+1 day')""",
+        lambda rnd, n: ((START + timedelta(days=rnd.randrange(n))).isoformat(),),
+    ),
+    "get_all_appointments(date)": (
+        """SELECT a.id, p.name, p.phone, a.service, a.date, a.time, a.status
+           FROM appointments a
+           JOIN patients p ON a.patient_id = p.id
+           WHERE a.date = ?
+           ORDER BY a.date DESC, a.time ASC""",
+        lambda rnd, n: ((START + timedelta(days=rnd.randrange(n))).isoformat(),),
+    ),
+    "get_all_appointments(first 50)": (
+        """SELECT a.id, p.name, p.phone, a.service, a.date, a.time, a.status
+           FROM appointments a
+           JOIN patients p ON a.patient_id = p.id
+           ORDER BY a.date DESC, a.time ASC
+           LIMIT 50""",
+        lambda rnd, n: (),
+    ),
+}
+
+
+def populate(path: Path, rows: int, patients: int, days: int) -> None:
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO patients (id, name, phone, email) VALUES (?, ?, ?, ?)",
+        ((i + 1, f"Patient {i}", f"03{i:09d}", f"p{i}@example.com") for i in range(patients)),
+    )
+    conn.executemany(
+        """INSERT INTO appointments (patient_id, service, date, time, status, reminder_24h_sent)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (
+            (
+                rnd.randrange(patients) + 1,
+                rnd.choice(SERVICES),
+                (START + timedelta(days=rnd.randrange(days))).isoformat(),
+                rnd.choice(TIMES),
+                "confirmed" if rnd.random() < 0.85 else "cancelled",
+                1 if rnd.random() < 0.95 else 0,
+            )
+            for _ in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(path: Path, label: str, domain: dict[str, int], repeat: int) -> dict[str, float]:
+    conn = sqlite3.connect(path)
+    results: dict[str, float] = {}
+    print(f"\n== {label} ==")
+    for name, (sql, params) in QUERIES.items():
+        rnd = random.Random(7)
+        n = domain[name]
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params(rnd, n)).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params(rnd, n)).fetchall()
+        per_call = (time.perf_counter() - start) / repeat * 1000
+        results[name] = per_call
+        print(f"{name:32s} {per_call:9.3f} ms")
+        for row in plan:
+            print(f"    {row[3]}")
+    conn.close()
+    return results
+
+
+async def apply(path: Path, target: int | None) -> None:
+    async with aiosqlite.connect(path) as db:
+        await migrate(db, target)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    patients = max(1, args.rows // 10)
+    days = 3650
+    domain = {name: days for name in QUERIES}
+    domain["create_appointment(patient)"] = patients
+    domain["get_patient_appointments"] = patients
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        asyncio.run(apply(path, 2))
+        t0 = time.perf_counter()
+        populate(path, args.rows, patients, days)
+        print(f"populated {args.rows:,} appointments / {patients:,} patients "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+        before = measure(path, "schema v2 (no secondary indexes)", domain, args.repeat)
+        t0 = time.perf_counter()
+        asyncio.run(apply(path, None))
+        print(f"\nmigrated to v{SCHEMA_VERSION} in {time.perf_counter() - t0:.1f}s")
+        after = measure(path, f"schema v{SCHEMA_VERSION}", domain, args.repeat)
+
+    print("\n== speedup ==")
+    for name in QUERIES:
+        print(f"{name:32s} {before[name] / max(after[name], 1e-6):9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
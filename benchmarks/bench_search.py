@@ -0,0 +1,134 @@
+"""Patient search: LIKE '%…%' scans versus the FTS5 index.
+
+Builds a throwaway database at the latest schema, fills it with synthetic
+patients and appointments, then times the admin search and the
+get_patient_appointments lookup both ways.
+
+    uv run python benchmarks/bench_search.py               # 200k patients
+    uv run python benchmarks/bench_search.py --patients 50000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from dental_receptionist.database import fts_query
+from dental_receptionist.migrations import migrate
+
+FIRST = ["Ayesha", "Bilal", "Fatima", "Hamza", "Jane", "John", "Maria", "Omar",
+         "Sara", "Usman", "Zainab", "Ali", "Hina", "Kamran", "Nadia", "Tariq"]
+LAST = ["Khan", "Ahmed", "Malik", "Qureshi", "Doe", "Smith", "Hussain", "Iqbal",
+        "Raza", "Sheikh", "Butt", "Chaudhry", "Mirza", "Siddiqui", "Javed", "Aslam"]
+
+LISTING = """
+    SELECT a.id, p.name AS patient_name, p.phone, p.email,
+           a.service, a.date, a.time, a.status, a.created_at
+    FROM appointments a
+    JOIN patients p ON a.patient_id = p.id
+    WHERE {cond}
+    ORDER BY a.date DESC, a.time ASC, a.id ASC
+"""
+LIKE_COND = "p.name LIKE ?"
+FTS_COND = "a.patient_id IN (SELECT rowid FROM patients_fts WHERE patients_fts MATCH ?)"
+
+LOOKUP = """
+    SELECT a.id, a.service, a.date, a.time, a.status
+    FROM appointments a
+    JOIN patients p ON a.patient_id = p.id
+    WHERE p.phone = ? AND {cond}
+    ORDER BY a.date, a.time
+"""
+LOOKUP_FTS_COND = (
+    "EXISTS (SELECT 1 FROM patients_fts WHERE patients_fts MATCH ? AND rowid = p.id)"
+)
+
+
+def populate(path: Path, patients: int, per_patient: int) -> None:
+    rnd = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO patients (id, name, phone, email) VALUES (?, ?, ?, ?)",
+        (
+            (i + 1, f"{rnd.choice(FIRST)} {rnd.choice(LAST)} {i}", f"03{i:09d}",
+             f"patient{i}@example.com")
+            for i in range(patients)
+        ),
+    )
+    conn.executemany(
+        # Historical rows, so the double-booking trigger doesn't apply.
+        "INSERT INTO appointments (patient_id, service, date, time, status) "
+        "VALUES (?, 'checkup', ?, ?, 'completed')",
+        (
+            (rnd.randrange(patients) + 1, f"2026-{rnd.randrange(1, 13):02d}-{rnd.randrange(1, 29):02d}",
+             f"{rnd.randrange(9, 17):02d}:00")
+            for _ in range(patients * per_patient)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        n = len(conn.execute(sql, params).fetchall())
+    return (time.perf_counter() - start) / repeat * 1000, n
+
+
+async def setup(path: Path) -> None:
+    async with aiosqlite.connect(path) as db:
+        await migrate(db)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=200_000)
+    parser.add_argument("--per-patient", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        asyncio.run(setup(path))
+        t0 = time.perf_counter()
+        populate(path, args.patients, args.per_patient)
+        print(f"populated {args.patients:,} patients / "
+              f"{args.patients * args.per_patient:,} appointments in {time.perf_counter() - t0:.1f}s")
+        conn = sqlite3.connect(path)
+
+        print(f"\n{'admin search':28s} {'LIKE ms':>10s} {'FTS ms':>10s} {'rows':>8s}")
+        for term in ["Zainab Mirza", "Qure", "12345", "Omar Ja"]:
+            like_ms, like_n = timed(conn, LISTING.format(cond=LIKE_COND), (f"%{term}%",), args.repeat)
+            fts_ms, fts_n = timed(conn, LISTING.format(cond=FTS_COND), (fts_query(term),), args.repeat)
+            print(f"{term!r:28s} {like_ms:10.2f} {fts_ms:10.2f} {fts_n:8d}  (LIKE rows {like_n})")
+
+        print(f"\n{'patient lookup':28s} {'LIKE ms':>10s} {'FTS ms':>10s}")
+        rnd = random.Random(7)
+        name, phone = conn.execute(
+            "SELECT name, phone FROM patients WHERE id = ?", (rnd.randrange(args.patients) + 1,)
+        ).fetchone()
+        first = name.split()[0]
+        like_ms, _ = timed(conn, LOOKUP.format(cond="p.name LIKE ?"), (phone, f"%{first}%"), args.repeat)
+        fts_ms, _ = timed(conn, LOOKUP.format(cond=LOOKUP_FTS_COND),
+                          (phone, fts_query(first, column="name")), args.repeat)
+        print(f"{first!r:28s} {like_ms:10.3f} {fts_ms:10.3f}")
+
+        print("\nplans:")
+        for label, sql, params in [
+            ("LIKE", LISTING.format(cond=LIKE_COND), ("%Qure%",)),
+            ("FTS", LISTING.format(cond=FTS_COND), (fts_query("Qure"),)),
+        ]:
+            print(f"  {label}:")
+            for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+                print(f"    {row[3]}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Tool-handler latency on the SQLite and in-memory storage backends.
+
+Seeds each backend with the same bookings, then times the read-heavy tool
+handlers the agent calls on most turns. The in-memory run isolates tool and
+slot-engine overhead from disk I/O.
+
+    uv run python benchmarks/bench_tools.py
+    uv run python benchmarks/bench_tools.py --days 365 --repeat 500
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from dental_receptionist import database
+from dental_receptionist.storage import InMemoryStorage, SQLiteStorage, set_storage
+from dental_receptionist.tools import TOOL_HANDLERS
+
+SERVICES = ["cleaning", "checkup", "filling", "extraction", "whitening", "emergency"]
+START = date(2026, 1, 5)
+
+
+async def seed(storage, days: int) -> None:
+    rnd = random.Random(42)
+    for offset in range(days):
+        d = (START + timedelta(days=offset)).isoformat()
+        for slot in range(0, 8 * 60, 30):
+            if rnd.random() < 0.3:
+                i = rnd.randrange(50_000)
+                await storage.create_appointment(
+                    f"Patient {i}", f"03{i:09d}", "", rnd.choice(SERVICES),
+                    d, f"{9 + slot // 60:02d}:{slot % 60:02d}",
+                )
+
+
+async def run(storage, days: int, repeat: int) -> dict[str, float]:
+    set_storage(storage)
+    await storage.open()
+    try:
+        t0 = time.perf_counter()
+        await seed(storage, days)
+        print(f"  seeded {days} days in {time.perf_counter() - t0:.1f}s")
+
+        rnd = random.Random(7)
+        calls = {
+            "check_availability": lambda: TOOL_HANDLERS["check_availability"](
+                date=(START + timedelta(days=rnd.randrange(days))).isoformat(),
+                service_type=rnd.choice(SERVICES)),
+            "find_next_available": lambda: TOOL_HANDLERS["find_next_available"](
+                service_type=rnd.choice(SERVICES),
+                from_date=(START + timedelta(days=rnd.randrange(days))).isoformat(),
+                days=14, limit=5),
+            "get_clinic_info": lambda: TOOL_HANDLERS["get_clinic_info"](
+                topic=rnd.choice(["hours", "services", "location", "parking"])),
+        }
+        results = {}
+        for name, call in calls.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await call()
+            results[name] = (time.perf_counter() - start) / repeat * 1000
+        return results
+    finally:
+        await storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = str(Path(tmp) / "bench.db")
+        print("sqlite:")
+        sqlite = asyncio.run(run(SQLiteStorage(), args.days, args.repeat))
+    print("memory:")
+    memory = asyncio.run(run(InMemoryStorage(), args.days, args.repeat))
+
+    print(f"\n{'tool':24s} {'sqlite ms':>10s} {'memory ms':>10s}")
+    for name in sqlite:
+        print(f"{name:24s} {sqlite[name]:10.3f} {memory[name]:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
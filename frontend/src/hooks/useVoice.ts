@@ -10,6 +10,7 @@ export function useVoice(lang: string, onTranscribed: (text: string) => void) {
   const recorderRef = useRef<MediaRecorder | null>(null);
   const streamRef = useRef<MediaStream | null>(null);
   const chunksRef = useRef<Blob[]>([]);
+  const startedRef = useRef(0);
   // Keep latest lang + callback in refs so MediaRecorder handlers see current values
   const langRef = useRef(lang);
   const onTranscribedRef = useRef(onTranscribed);
@@ -43,11 +44,13 @@ export function useVoice(lang: string, onTranscribed: (text: string) => void) {
 
       recorder.addEventListener("stop", async () => {
         const blob = new Blob(chunksRef.current, { type: "audio/webm" });
+        const duration = (Date.now() - startedRef.current) / 1000;
         setVoiceStatus("Processing…");
         try {
           const form = new FormData();
           form.append("audio", blob, "recording.webm");
           form.append("language", langRef.current);
+          form.append("duration", duration.toFixed(1));
           const res = await fetch(`${API_BASE}/transcribe`, { method: "POST", body: form });
           if (!res.ok) throw new Error(`HTTP ${res.status}`);
           const { text } = (await res.json()) as { text: string };
@@ -60,6 +63,7 @@ export function useVoice(lang: string, onTranscribed: (text: string) => void) {
       });
 
       recorder.start();
+      startedRef.current = Date.now();
       setIsListening(true);
       setVoiceStatus("Listening…");
     } catch (err) {
@@ -0,0 +1,78 @@
+"""Global admission control for chat turns.
+
+At most CHAT_MAX_ACTIVE turns (each an upstream model stream) run at once.
+Up to CHAT_MAX_QUEUE more wait for a slot, for no longer than
+CHAT_QUEUE_TIMEOUT seconds; anything beyond that is rejected so the
+endpoint can answer 429 with Retry-After instead of piling up work and
+tripping API rate limits.
+"""
+
+import asyncio
+import os
+
+from .metrics import CHAT_REJECTED_TOTAL
+
+CHAT_MAX_ACTIVE = int(os.getenv("CHAT_MAX_ACTIVE", "32"))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "64"))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "10"))
+CHAT_RETRY_AFTER = int(os.getenv("CHAT_RETRY_AFTER", "5"))
+
+
+class Ticket:
+    """An admitted slot. release() is idempotent so every exit path may call it."""
+
+    __slots__ = ("_controller", "_released")
+
+    def __init__(self, controller: "AdmissionController") -> None:
+        self._controller = controller
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_active: int = CHAT_MAX_ACTIVE,
+        max_queue: int = CHAT_MAX_QUEUE,
+        queue_timeout: float = CHAT_QUEUE_TIMEOUT,
+        retry_after: int = CHAT_RETRY_AFTER,
+    ) -> None:
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_active)
+        self.active = 0
+        self.waiting = 0
+
+    async def acquire(self) -> Ticket | None:
+        """Wait for a slot; None means the request should be shed."""
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            CHAT_REJECTED_TOTAL.inc()
+            return None
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            CHAT_REJECTED_TOTAL.inc()
+            return None
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return Ticket(self)
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+        }
@@ -1,6 +1,6 @@
 """Claude-powered receptionist: agentic loop with SSE streaming."""
 
-import json
+import asyncio
 import os
 import time
 from typing import AsyncGenerator
@@ -8,8 +8,20 @@ from typing import AsyncGenerator
 from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
+from .compaction import compact_history
 from .config import CLINIC_NAME, CLINIC_PHONE
-from .tools import TOOLS, TOOL_HANDLERS
+from .metrics import (
+    CHAT_TOOL_LOOPS,
+    CHAT_TURNS_TOTAL,
+    SESSIONS_STARTED_TOTAL,
+    TOOL_ERRORS_TOTAL,
+    TOOL_SECONDS,
+)
+from .router import fast_reply
+from .routing import choose_tier, escalate, record_call, record_error, record_escalation
+from .sessions import SessionClaim, SessionLocks, SessionStore, create_session_store
+from .sse import SSEEmitter
+from .tools import PARALLEL_SAFE_TOOLS, TOOLS, TOOL_HANDLERS
 
 load_dotenv()
 
@@ -36,6 +48,8 @@ Important guidelines:
 2. If after business hours (Mon–Fri 9 AM–5 PM, Sat 9 AM–1 PM), acknowledge it and reassure them
    you can still help with scheduling and information.
 3. Before scheduling, always check availability first with the check_availability tool.
+   When the patient wants the earliest or next opening, use find_next_available to search
+   several days in one call instead of checking dates one at a time.
 4. Collect name, phone, and email before booking an appointment.
 5. Confirm all appointment details with the patient before calling schedule_appointment.
 6. Never provide specific medical diagnoses; always recommend consulting the dentist.
@@ -47,7 +61,45 @@ Important guidelines:
 11. Keep each response concise (2-3 sentences max per turn when possible).
 """
 
-SESSION_EXPIRY = 7200  # 2 hours in seconds
+# Max read-only tool calls from a single model turn that run at once
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+
+# ---------------------------------------------------------------------------
+# Prompt caching
+# ---------------------------------------------------------------------------
+# Tools, system prompt and conversation prefix are identical across every
+# iteration of the tool loop, so each gets a cache breakpoint and later calls
+# read them from the prompt cache instead of reprocessing them.
+
+_CACHE = {"type": "ephemeral"}
+
+SYSTEM_BLOCKS = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": _CACHE}]
+
+CACHED_TOOLS = [*TOOLS[:-1], {**TOOLS[-1], "cache_control": _CACHE}]
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+def _with_history_breakpoint(history: list) -> list:
+    """Return *history* with a cache breakpoint on its last content block.
+
+    Only the final message is copied; stored history is never mutated, so
+    the breakpoint moves forward as the conversation grows.
+    """
+    if not history:
+        return history
+    last = history[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content, "cache_control": _CACHE}]
+    else:
+        blocks = [*content[:-1], {**content[-1], "cache_control": _CACHE}]
+    return [*history[:-1], {**last, "content": blocks}]
 
 
 def _serialize_block(block) -> dict:
@@ -63,79 +115,185 @@ def _serialize_block(block) -> dict:
     return {"type": t}
 
 
+async def _run_tool(block) -> dict:
+    """Run one tool_use block; failures come back flagged with is_error."""
+    handler = TOOL_HANDLERS.get(block.name)
+    error = False
+    started = time.perf_counter()
+    try:
+        if handler:
+            result = await handler(**block.input)
+        else:
+            result, error = f"Unknown tool: {block.name}", True
+    except Exception as exc:
+        result, error = f"Tool '{block.name}' error: {exc}", True
+    TOOL_SECONDS.observe(time.perf_counter() - started, tool=block.name)
+    tool_result = {"type": "tool_result", "tool_use_id": block.id, "content": result}
+    if error:
+        TOOL_ERRORS_TOTAL.inc(tool=block.name)
+        tool_result["is_error"] = True
+    return tool_result
+
+
+async def _run_tools(blocks: list) -> list[dict]:
+    """Execute tool_use blocks, returning tool_result blocks in the same order.
+
+    Consecutive read-only calls (PARALLEL_SAFE_TOOLS) are gathered under a
+    TOOL_CONCURRENCY limit; any other call waits for the batch before it and
+    runs alone, so reads issued after a booking still see it.
+    """
+    limit = asyncio.Semaphore(TOOL_CONCURRENCY)
+
+    async def limited(block) -> dict:
+        async with limit:
+            return await _run_tool(block)
+
+    results: list[dict] = []
+    batch: list = []
+    for block in blocks:
+        if block.name in PARALLEL_SAFE_TOOLS:
+            batch.append(block)
+            continue
+        if batch:
+            results += await asyncio.gather(*(limited(b) for b in batch))
+            batch = []
+        results.append(await _run_tool(block))
+    if batch:
+        results += await asyncio.gather(*(limited(b) for b in batch))
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Agent
 # ---------------------------------------------------------------------------
 
 class ReceptionistAgent:
-    def __init__(self) -> None:
+    def __init__(self, sessions: SessionStore | None = None) -> None:
         self.client = AsyncAnthropic()
-        self.sessions: dict[str, dict] = {}
+        self.sessions = sessions if sessions is not None else create_session_store()
+        self._locks = SessionLocks()
 
     # ------------------------------------------------------------------
     # Session management
     # ------------------------------------------------------------------
 
-    def _get_session_history(self, session_id: str) -> list:
-        now = time.time()
-        # Purge expired sessions
-        for sid in list(self.sessions):
-            if now - self.sessions[sid]["ts"] > SESSION_EXPIRY:
-                del self.sessions[sid]
+    async def _load_session(self, session_id: str) -> dict:
+        session = await self.sessions.load(session_id)
+        session.setdefault("usage", dict.fromkeys(USAGE_FIELDS, 0))
+        return session
 
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {"history": [], "ts": now}
-        else:
-            self.sessions[session_id]["ts"] = now
+    async def get_session_usage(self, session_id: str) -> dict | None:
+        """Token counters (including prompt-cache reads/writes) for a session."""
+        session = await self.sessions.get(session_id)
+        return dict(session.get("usage", {})) if session else None
 
-        return self.sessions[session_id]["history"]
+    @staticmethod
+    def _record_usage(session: dict, usage) -> None:
+        if usage is None:
+            return
+        counters = session["usage"]
+        for field in USAGE_FIELDS:
+            counters[field] += getattr(usage, field, None) or 0
 
     # ------------------------------------------------------------------
     # Streaming agentic loop
     # ------------------------------------------------------------------
 
-    async def stream_response(
+    def claim(self, session_id: str) -> SessionClaim | None:
+        """Reserve *session_id* for one turn; None if a turn is already in flight."""
+        return self._locks.claim(session_id)
+
+    async def open_turn(
         self, session_id: str, user_message: str
-    ) -> AsyncGenerator[str, None]:
-        """Yield SSE-formatted strings: text chunks, tool signals, done/error."""
-        history = self._get_session_history(session_id)
+    ) -> tuple[dict, bytes | None]:
+        """Load the session and try the fast path (FAQ / hours, no model).
+
+        Returns the session and, if the fast path answered, the turn's
+        complete SSE frames (the turn is already saved). Otherwise pass the
+        session on to stream_response(). The caller must hold the claim.
+        """
+        session = await self._load_session(session_id)
+        history = session["history"]
+        reply = await fast_reply(user_message, history)
+        if reply is None:
+            return session, None
+        if not history:
+            SESSIONS_STARTED_TOTAL.inc()
+        CHAT_TURNS_TOTAL.inc(path="fast")
         history.append({"role": "user", "content": user_message})
+        history.append({"role": "assistant", "content": [{"type": "text", "text": reply}]})
+        await self.sessions.save(session_id, session)
+        emitter = SSEEmitter()
+        return session, emitter.text(reply) + emitter.event({"type": "done"})
 
-        def sse(payload: dict) -> str:
-            return f"data: {json.dumps(payload)}\n\n"
+    async def stream_response(
+        self, session_id: str, session: dict, user_message: str
+    ) -> AsyncGenerator[bytes, None]:
+        """Yield encoded SSE frames for a model turn: text chunks, tool signals, done/error.
+
+        *session* comes from open_turn(); the caller must hold the claim.
+        """
+        history = session["history"]
+        emitter = SSEEmitter()
+        if not history:
+            SESSIONS_STARTED_TOTAL.inc()
+
+        CHAT_TURNS_TOTAL.inc(path="model")
+        tier = choose_tier(session, user_message)
+        history.append({"role": "user", "content": user_message})
+        loops = 0
 
         try:
             while True:
+                loops += 1
                 response_content = []
                 stop_reason = None
+                compact_history(history)
 
                 # ---- Stream a single turn -----------------------------
+                started = time.perf_counter()
+                ttft = None
                 async with self.client.messages.stream(
-                    model="claude-opus-4-6",
-                    max_tokens=8096,
-                    system=SYSTEM_PROMPT,
-                    messages=history,
-                    tools=TOOLS,
+                    model=tier.model,
+                    max_tokens=tier.max_tokens,
+                    system=SYSTEM_BLOCKS,
+                    messages=_with_history_breakpoint(history),
+                    tools=CACHED_TOOLS,
                 ) as stream:
                     async for event in stream:
                         etype = getattr(event, "type", None)
+                        if ttft is None and etype in ("content_block_start", "content_block_delta"):
+                            ttft = time.perf_counter() - started
 
+                        frame = b""
                         if etype == "content_block_start":
                             cb = getattr(event, "content_block", None)
                             if cb and getattr(cb, "type", None) == "tool_use":
-                                yield sse({"type": "tool", "name": cb.name})
+                                frame = emitter.event({"type": "tool", "name": cb.name})
 
                         elif etype == "content_block_delta":
                             delta = getattr(event, "delta", None)
                             if delta:
                                 dtype = getattr(delta, "type", None)
                                 if dtype == "text_delta":
-                                    yield sse({"type": "text", "chunk": delta.text})
+                                    frame = emitter.text(delta.text)
                                 # thinking_delta → skip (internal reasoning only)
 
+                        # Text is coalesced; flush it once it has waited long enough.
+                        frame = frame or emitter.poll()
+                        if frame:
+                            yield frame
+
                     final_msg = await stream.get_final_message()
                     stop_reason = final_msg.stop_reason
                     response_content = final_msg.content
+                    self._record_usage(session, final_msg.usage)
+                    record_call(tier, time.perf_counter() - started, ttft, final_msg.usage)
+
+                # Don't hold text back while tools run.
+                frame = emitter.flush()
+                if frame:
+                    yield frame
 
                 # ---- Store assistant turn in history -----------------------
                 # Serialize only the fields the API accepts (model_dump() includes
@@ -150,28 +308,24 @@ class ReceptionistAgent:
                     break
 
                 # ---- Execute tool calls ------------------------------------
-                tool_results = []
-                for block in response_content:
-                    if getattr(block, "type", None) != "tool_use":
-                        continue
-                    handler = TOOL_HANDLERS.get(block.name)
-                    try:
-                        if handler:
-                            result = await handler(**block.input)
-                        else:
-                            result = f"Unknown tool: {block.name}"
-                    except Exception as exc:
-                        result = f"Tool '{block.name}' error: {exc}"
-
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": block.id,
-                        "content": result,
-                    })
+                tool_results = await _run_tools([
+                    b for b in response_content if getattr(b, "type", None) == "tool_use"
+                ])
 
                 history.append({"role": "user", "content": tool_results})
 
+                # ---- A failed tool call moves the session up a tier --------
+                if any(r.get("is_error") for r in tool_results):
+                    next_tier = escalate(session, tier)
+                    if next_tier is not tier:
+                        record_escalation(tier)
+                        tier = next_tier
+
         except Exception as exc:
-            yield sse({"type": "error", "message": str(exc)})
+            record_error(tier)
+            yield emitter.event({"type": "error", "message": str(exc)})
+        finally:
+            CHAT_TOOL_LOOPS.observe(loops)
+            await self.sessions.save(session_id, session)
 
-        yield sse({"type": "done"})
+        yield emitter.event({"type": "done"})
@@ -1,60 +1,172 @@
 """FastAPI application: REST + SSE endpoints."""
 
+import asyncio
 import os
-import secrets
-import tempfile
 import uuid
 from contextlib import asynccontextmanager
+from datetime import date, timedelta
 from pathlib import Path
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from fastapi import Depends, FastAPI, File, HTTPException, Request, UploadFile, status
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials, HTTPBearer
 from openai import AsyncOpenAI
 
-import hashlib
-import hmac as _hmac
+import gzip
 import json
-import os as _os
-
-from .database import (
-    cancel_appointment,
-    get_all_appointments,
-    get_effective_clinic_info,
-    get_effective_hours,
-    get_effective_services,
-    get_setting,
-    init_db,
-    set_setting,
-)
+import time
+
+from . import auth
+from .admission import AdmissionController
+from .database import MAX_SEARCH_DAYS
+from . import metrics
+from .storage import configure_storage, get_storage
 from .agent import ReceptionistAgent
 from .reminders import send_24h_reminders
+from .sse import encode_event
+from .static_cache import STATIC_RELOAD, StaticCache, accepted_encodings, etag_matches
 
-_basic = HTTPBasic()
+_basic = HTTPBasic(auto_error=False)
+_bearer = HTTPBearer(auto_error=False)
 
-# Shared agent instance (manages session state in memory)
+# Shared agent instance (session store chosen by SESSION_STORE)
 agent = ReceptionistAgent()
 
+# Caps concurrent chat turns (upstream model streams) across all sessions
+admission = AdmissionController()
+
+metrics.CallbackMetric(
+    "chat_admission", "Chat turns running and queued right now.",
+    lambda: {(k,): v for k, v in admission.stats().items() if k in ("active", "waiting")},
+    ("state",),
+)
+metrics.CallbackMetric(
+    "sessions_live", "Sessions held by the in-memory session store.",
+    lambda: {(): len(agent.sessions)} if hasattr(agent.sessions, "__len__") else {},
+)
+
 openai_client = AsyncOpenAI()  # reads OPENAI_API_KEY from env
 
 STATIC_DIR = Path(os.getenv("STATIC_DIR", "static"))
 
+# HTML/JS/CSS served from memory with precompressed variants and ETags
+static_files = StaticCache(STATIC_DIR)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    storage = configure_storage()
+    await storage.open()
+    await agent.sessions.open()
+    static_files.load()
+    watcher = asyncio.create_task(static_files.watch()) if STATIC_RELOAD else None
     scheduler = AsyncIOScheduler()
     scheduler.add_job(send_24h_reminders, "interval", minutes=30)
+    scheduler.add_job(agent.sessions.evict_expired, "interval", minutes=10)
     scheduler.start()
     yield
     scheduler.shutdown()
+    if watcher:
+        watcher.cancel()
+    await agent.sessions.close()
+    await storage.close()
 
 
 app = FastAPI(title="Dental AI Receptionist", lifespan=lifespan)
 
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def static(path: str, request: Request):
+    response = static_files.response(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Audio uploads
+# ---------------------------------------------------------------------------
+# Starlette's multipart parser already streams the body in chunks into a
+# SpooledTemporaryFile (kept in memory up to 1 MB), so that spool is handed
+# to Whisper as-is: no extra in-memory copy, no temp file, no blocking open().
+#
+# The enforced limits are TRANSCRIBE_MAX_BYTES and the TRANSCRIBE_CONCURRENCY
+# semaphore. TRANSCRIBE_MAX_SECONDS is only advisory: it checks the
+# recorder's own ``duration`` field, so it stops a stuck or runaway
+# recording from an honest client but can be bypassed by any caller.
+# Measuring the length server-side would mean decoding the audio first.
+
+TRANSCRIBE_MAX_BYTES = int(os.getenv("TRANSCRIBE_MAX_BYTES", str(25 * 1024 * 1024)))
+TRANSCRIBE_MAX_SECONDS = float(os.getenv("TRANSCRIBE_MAX_SECONDS", "120"))
+TRANSCRIBE_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
+AUDIO_PATHS = {"/transcribe", "/voice"}
+_MULTIPART_SLACK = 64 * 1024    # boundaries and the small form fields
+
+_transcribe_slots = asyncio.Semaphore(TRANSCRIBE_CONCURRENCY)
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+class _AudioUploadLimit:
+    """Answer 413 once an audio upload's body exceeds the byte limit.
+
+    A too-large Content-Length is refused before anything is read. Chunked
+    uploads carry no Content-Length, so the body is also counted as it
+    arrives and reading stops as soon as it passes the limit, before the
+    multipart parser can spool the rest.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in AUDIO_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limit = TRANSCRIBE_MAX_BYTES + _MULTIPART_SLACK
+        too_large = JSONResponse({"detail": "Audio upload too large"}, status_code=413)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length and length.isdigit() and int(length) > limit:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def counting_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _UploadTooLarge
+            return message
+
+        async def guarded_send(message):
+            # The app's own answer to the aborted parse (a 400) is replaced below.
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, counting_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await too_large(scope, receive, send)
+
+
+app.add_middleware(_AudioUploadLimit)
+
+# Added last so it is outermost: every response, the 413s above included,
+# gets CORS headers.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[os.getenv("FRONTEND_URL", "*")],
@@ -63,60 +175,121 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+def _check_audio(audio: UploadFile, duration: float | None) -> None:
+    """Reject empty or oversized uploads, and recordings the client reports as overlong."""
+    size = audio.size
+    if size is None:
+        size = audio.file.seek(0, os.SEEK_END)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Empty audio upload")
+    if size > TRANSCRIBE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Audio upload too large")
+    # Advisory: trusts the client's duration (see the section comment above)
+    if duration is not None and duration > TRANSCRIBE_MAX_SECONDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Recording longer than {TRANSCRIBE_MAX_SECONDS:g} seconds",
+        )
+
+
+async def _transcribe_audio(audio: UploadFile, language: str) -> str:
+    """Send the upload's spool to Whisper, at most TRANSCRIBE_CONCURRENCY at a time."""
+    await audio.seek(0)
+    waited = time.perf_counter()
+    async with _transcribe_slots:
+        metrics.TRANSCRIBE_WAIT_SECONDS.observe(time.perf_counter() - waited)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await openai_client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(
+                    audio.filename or "recording.webm",
+                    audio.file,
+                    audio.content_type or "audio/webm",
+                ),
+                language=language,
+            )
+            outcome = "ok"
+        finally:
+            metrics.TRANSCRIBE_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+    return result.text
 
 
 # ---------------------------------------------------------------------------
 # Auth helper
 # ---------------------------------------------------------------------------
 
-def _hash_password(plain: str) -> str:
-    """Return a PBKDF2-SHA256 hash string: '<salt_hex>:<dk_hex>'."""
-    salt = _os.urandom(32)
-    dk = hashlib.pbkdf2_hmac("sha256", plain.encode(), salt, 200_000)
-    return salt.hex() + ":" + dk.hex()
+def _unauthorized(detail: str = "Invalid credentials", scheme: str = "Basic") -> HTTPException:
+    # A Bearer challenge for a failed token, so browsers don't pop up a Basic login dialog.
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": scheme},
+    )
+
 
+async def _verify_admin(
+    basic: HTTPBasicCredentials | None = Depends(_basic),
+    bearer: HTTPAuthorizationCredentials | None = Depends(_bearer),
+):
+    """Accept a session token from /api/admin/login, or HTTP Basic credentials."""
+    if bearer is not None and await auth.verify_token(bearer.credentials):
+        return
+    if basic is not None and await auth.check_credentials(basic.username, basic.password):
+        return
+    if bearer is not None:
+        raise _unauthorized("Session expired", scheme="Bearer")
+    raise _unauthorized()
 
-def _verify_hash(plain: str, stored: str) -> bool:
-    """Verify *plain* against a stored PBKDF2 hash string."""
-    try:
-        salt_hex, dk_hex = stored.split(":", 1)
-        salt = bytes.fromhex(salt_hex)
-        dk = hashlib.pbkdf2_hmac("sha256", plain.encode(), salt, 200_000)
-        return _hmac.compare_digest(dk.hex(), dk_hex)
-    except Exception:
-        return False
-
-
-async def _check_password(plain: str) -> bool:
-    """Return True if *plain* matches the stored admin password."""
-    hashed = await get_setting("admin_password")
-    if hashed:
-        return _verify_hash(plain, hashed)
-    # Fall back to plain-text compare against env var / default
-    fallback = os.getenv("ADMIN_PASSWORD", "admin123")
-    return secrets.compare_digest(plain.encode(), fallback.encode())
-
-
-async def _verify_admin(credentials: HTTPBasicCredentials = Depends(_basic)):
-    """Validate HTTP Basic credentials; checks bcrypt hash in DB with plain-text fallback."""
-    username_ok = secrets.compare_digest(credentials.username.encode(), b"admin")
-    password_ok = await _check_password(credentials.password)
-    if not (username_ok and password_ok):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid credentials",
-            headers={"WWW-Authenticate": "Basic"},
-        )
+
+# ---------------------------------------------------------------------------
+# Conditional admin responses
+# ---------------------------------------------------------------------------
+# Admin reads carry an ETag built from the storage's shared data_version()
+# counter ('appointments' or 'settings'). Under SQLite it lives in the
+# data_versions table and is bumped by triggers, so a write through any
+# worker changes it. A matching If-None-Match gets a 304 after that one-row
+# lookup, before the listing or settings queries run.
+
+ADMIN_GZIP_MIN_BYTES = int(os.getenv("ADMIN_GZIP_MIN_BYTES", "4096"))
+
+
+async def _data_etag(name: str) -> str:
+    return f'"{name}-{await get_storage().data_version(name)}"'
+
+
+def _etag_headers(etag: str) -> dict:
+    # Weak: the gzipped and plain bodies share one version tag.
+    return {"ETag": "W/" + etag, "Cache-Control": "private, no-cache"}
+
+
+def _not_modified(request: Request, etag: str) -> Response | None:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, {etag}):
+        return Response(status_code=304, headers=_etag_headers(etag))
+    return None
+
+
+async def _admin_json(request: Request, payload, etag: str) -> Response:
+    """JSON with a (weak) ETag, gzipped when large and the client accepts it."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    headers = _etag_headers(etag)
+    if len(body) >= ADMIN_GZIP_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+            body = await asyncio.to_thread(gzip.compress, body, 6)
+            headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
 
 
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
 
-@app.get("/", response_class=HTMLResponse)
-async def index():
-    return HTMLResponse((STATIC_DIR / "index.html").read_text(encoding="utf-8"))
+@app.api_route("/", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def index(request: Request):
+    return static_files.response(request, "index.html")
 
 
 @app.get("/session")
@@ -125,6 +298,85 @@ async def create_session():
     return JSONResponse({"session_id": str(uuid.uuid4())})
 
 
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def _busy() -> JSONResponse:
+    return JSONResponse(
+        {"error": "The assistant is busy right now. Please try again shortly."},
+        status_code=429,
+        headers={"Retry-After": str(admission.retry_after)},
+    )
+
+
+def _conflict() -> JSONResponse:
+    return JSONResponse(
+        {"error": "A reply to this chat is still in progress."},
+        status_code=409,
+    )
+
+
+async def _agent_stream(session_id: str, message: str, first: bytes = b"", ticket=None):
+    """Stream one chat turn as SSE, after the optional *first* frame.
+
+    A session has at most one turn in flight; another gets 409 instead of
+    waiting. Fast-path answers need no admission slot. A model turn uses
+    *ticket* if the caller already holds one, otherwise a slot is acquired
+    here (429 when the server is saturated).
+    """
+    claim = agent.claim(session_id)
+    if claim is None:
+        if ticket is not None:
+            ticket.release()
+        return _conflict()
+    try:
+        session, reply = await agent.open_turn(session_id, message)
+        if reply is None and ticket is None:
+            ticket = await admission.acquire()
+    except BaseException:
+        claim.release()
+        if ticket is not None:
+            ticket.release()
+        raise
+
+    if reply is not None:
+        claim.release()
+        if ticket is not None:
+            ticket.release()
+        return StreamingResponse(
+            iter([first + reply]), media_type="text/event-stream", headers=_SSE_HEADERS,
+        )
+    if ticket is None:
+        claim.release()
+        return _busy()
+
+    def release() -> None:
+        ticket.release()
+        claim.release()
+
+    async def generate():
+        try:
+            if first:
+                yield first
+            async for chunk in agent.stream_response(session_id, session, message):
+                yield chunk
+        finally:
+            release()
+
+    # The background task covers a client that disconnects before the
+    # generator starts; both releases are idempotent.
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+        background=BackgroundTask(release),
+    )
+
+
 @app.post("/chat")
 async def chat(request: Request):
     """Accept {session_id, message} and stream back SSE events."""
@@ -137,61 +389,174 @@ async def chat(request: Request):
             {"error": "Both session_id and message are required."},
             status_code=400,
         )
+    return await _agent_stream(session_id, message)
 
-    async def generate():
-        async for chunk in agent.stream_response(session_id, message):
-            yield chunk
 
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+@app.post("/voice")
+async def voice(
+    audio: UploadFile = File(...),
+    session_id: str = Form(""),
+    language: str = Form("en"),
+    duration: float | None = Form(None),
+):
+    """Transcribe a voice message and reply in one SSE stream.
+
+    The stream opens with ``{"type": "transcript", "text": ...}`` followed by
+    the same text/tool/done events as /chat, saving the client a round trip.
+    """
+    if not session_id:
+        return JSONResponse({"error": "session_id is required."}, status_code=400)
+    _check_audio(audio, duration)
+    # Admit before transcribing so a request that would get 429 costs no Whisper call.
+    ticket = await admission.acquire()
+    if ticket is None:
+        return _busy()
+    try:
+        text = (await _transcribe_audio(audio, language)).strip()
+    except BaseException as exc:
+        ticket.release()
+        if isinstance(exc, Exception):
+            raise HTTPException(status_code=502, detail=f"Transcription failed: {exc}")
+        raise
+
+    transcript = encode_event({"type": "transcript", "text": text})
+    if not text:
+        ticket.release()
+        return StreamingResponse(
+            iter([transcript + encode_event({"type": "done"})]),
+            media_type="text/event-stream",
+            headers=_SSE_HEADERS,
+        )
+    return await _agent_stream(session_id, text, first=transcript, ticket=ticket)
+
+
+@app.get("/availability/next")
+async def next_available(
+    service_type: str,
+    from_date: str | None = None,
+    days: int = 7,
+    limit: int = 5,
+):
+    """Return the earliest openings for a service across *days* days from *from_date*."""
+    services = await get_storage().get_effective_services()
+    if service_type not in services:
+        raise HTTPException(status_code=400, detail=f"Unknown service: {service_type}")
+    if not 1 <= days <= MAX_SEARCH_DAYS or not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="days or limit out of range")
+    from_date = from_date or date.today().isoformat()
+    slots = await get_storage().find_next_available(service_type, from_date, days, limit)
+    return JSONResponse({"service_type": service_type, "from_date": from_date, "slots": slots})
 
 
 # ---------------------------------------------------------------------------
 # Admin routes
 # ---------------------------------------------------------------------------
 
-@app.get("/admin", response_class=HTMLResponse)
-async def admin_page():
-    return HTMLResponse((STATIC_DIR / "admin.html").read_text(encoding="utf-8"))
+@app.api_route("/admin", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def admin_page(request: Request):
+    return static_files.response(request, "admin.html")
 
 
 @app.get("/api/appointments")
 async def api_appointments(
+    request: Request,
     date: str | None = None,
     status_filter: str | None = None,
     search: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    fmt: str = Query("json", alias="format"),
     _: None = Depends(_verify_admin),
 ):
-    """Return all appointments as JSON. Supports ?date=, ?status_filter=, ?search= query params."""
-    rows = await get_all_appointments(
-        date_filter=date,
-        status_filter=status_filter,
-        search=search,
-    )
-    return JSONResponse(rows)
+    """Return appointments as JSON. Supports ?date=, ?status_filter=, ?search= query params.
+
+    Without ?limit/?cursor the full list is returned (legacy shape). With
+    them, a keyset page ``{items, next_cursor}`` is returned; pass
+    next_cursor back as ?cursor= for the following page. ?format=ndjson
+    streams every matching row as one JSON object per line.
+    """
+    # Taken before querying: a write that races the query yields a newer
+    # version on the next request, never a stale 304.
+    etag = await _data_etag("appointments")
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if fmt == "ndjson":
+        async def lines():
+            async for row in get_storage().iter_appointments(
+                date_filter=date, status_filter=status_filter, search=search,
+            ):
+                yield (json.dumps(row) + "\n").encode()
+
+        return StreamingResponse(
+            lines(), media_type="application/x-ndjson", headers=_etag_headers(etag),
+        )
 
+    if limit is None and cursor is None:
+        rows = await get_storage().get_all_appointments(
+            date_filter=date,
+            status_filter=status_filter,
+            search=search,
+        )
+        return await _admin_json(request, rows, etag)
 
-@app.post("/transcribe")
-async def transcribe(audio: UploadFile = File(...), language: str = "en"):
-    """Transcribe audio using OpenAI Whisper. Returns {text: ...}."""
-    with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as tmp:
-        tmp.write(await audio.read())
-        tmp_path = tmp.name
+    limit = min(max(limit or 100, 1), 500)
     try:
-        with open(tmp_path, "rb") as f:
-            result = await openai_client.audio.transcriptions.create(
-                model="whisper-1", file=f, language=language
-            )
-        return JSONResponse({"text": result.text})
-    finally:
-        os.unlink(tmp_path)
+        page = await get_storage().get_appointments_page(
+            date_filter=date,
+            status_filter=status_filter,
+            search=search,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return await _admin_json(request, page, etag)
+
+
+@app.get("/api/stats")
+async def api_stats(
+    from_date: str | None = None,
+    to_date: str | None = None,
+    _: None = Depends(_verify_admin),
+):
+    """Return per-day counts, utilization and totals (default: 30 days either side of today)."""
+    today = date.today()
+    from_date = from_date or (today - timedelta(days=30)).isoformat()
+    to_date = to_date or (today + timedelta(days=30)).isoformat()
+    return JSONResponse(await get_storage().get_stats_summary(from_date, to_date))
+
+
+@app.get("/api/sessions/{session_id}/usage")
+async def api_session_usage(session_id: str, _: None = Depends(_verify_admin)):
+    """Token counters for one chat session, including prompt-cache reads and writes."""
+    usage = await agent.get_session_usage(session_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return JSONResponse(usage)
+
+
+@app.post("/transcribe")
+async def transcribe(
+    audio: UploadFile = File(...),
+    language: str = Form("en"),
+    duration: float | None = Form(None),
+):
+    """Transcribe audio using OpenAI Whisper. Returns {text: ...}.
+
+    Uploads over TRANSCRIBE_MAX_BYTES get 413. *duration* (seconds) is
+    optional and reported by the recorder; it is checked against
+    TRANSCRIBE_MAX_SECONDS as an advisory limit only.
+    """
+    _check_audio(audio, duration)
+    return JSONResponse({"text": await _transcribe_audio(audio, language)})
+
+
+@app.get("/metrics")
+async def metrics_endpoint(_: None = Depends(_verify_admin)):
+    """Prometheus scrape endpoint (admin credentials, e.g. scrape basic_auth)."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/api/appointments/{appointment_id}/cancel")
@@ -202,27 +567,41 @@ async def api_cancel_appointment(
 ):
     body = await request.json()
     reason = body.get("reason", "Cancelled by staff")
-    cancelled = await cancel_appointment(appointment_id, reason)
+    cancelled = await get_storage().cancel_appointment(appointment_id, reason)
     if not cancelled:
         raise HTTPException(status_code=404, detail="Appointment not found or already cancelled")
     return JSONResponse({"ok": True})
 
 
+@app.post("/api/admin/login")
+async def api_admin_login(credentials: HTTPBasicCredentials | None = Depends(_basic)):
+    """Exchange Basic credentials for a short-lived Bearer session token."""
+    if credentials is None or not await auth.check_credentials(
+        credentials.username, credentials.password
+    ):
+        raise _unauthorized()
+    return JSONResponse({"token": await auth.issue_token(), "expires_in": auth.ADMIN_TOKEN_TTL})
+
+
+@app.post("/api/admin/refresh")
+async def api_admin_refresh(bearer: HTTPAuthorizationCredentials | None = Depends(_bearer)):
+    """Trade a still-valid session token for a fresh one (sliding expiry)."""
+    if bearer is None or not await auth.verify_token(bearer.credentials):
+        raise _unauthorized("Session expired", scheme="Bearer")
+    return JSONResponse({"token": await auth.issue_token(), "expires_in": auth.ADMIN_TOKEN_TTL})
+
+
 @app.post("/api/admin/change-password")
 async def api_change_password(
     request: Request,
-    credentials: HTTPBasicCredentials = Depends(_basic),
+    credentials: HTTPBasicCredentials | None = Depends(_basic),
 ):
     """Change the admin password. Requires valid current credentials in Basic Auth."""
     # Verify current credentials first
-    username_ok = secrets.compare_digest(credentials.username.encode(), b"admin")
-    current_password_ok = await _check_password(credentials.password)
-    if not (username_ok and current_password_ok):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Current password is incorrect",
-            headers={"WWW-Authenticate": "Basic"},
-        )
+    if credentials is None or not await auth.check_credentials(
+        credentials.username, credentials.password
+    ):
+        raise _unauthorized("Current password is incorrect")
 
     body = await request.json()
     new_password: str = body.get("new_password", "")
@@ -233,26 +612,37 @@ async def api_change_password(
     if len(new_password) < 8:
         raise HTTPException(status_code=400, detail="Password must be at least 8 characters")
 
-    hashed = _hash_password(new_password)
-    await set_setting("admin_password", hashed)
-    return JSONResponse({"ok": True})
+    # Revokes existing tokens, so hand the caller a fresh one
+    await auth.set_password(new_password)
+    return JSONResponse({
+        "ok": True, "token": await auth.issue_token(), "expires_in": auth.ADMIN_TOKEN_TTL,
+    })
 
 
 @app.get("/api/settings")
-async def api_get_settings(_: None = Depends(_verify_admin)):
+async def api_get_settings(request: Request, _: None = Depends(_verify_admin)):
     """Return current effective clinic settings (info, hours, services)."""
-    return JSONResponse({
-        "info":     await get_effective_clinic_info(),
-        "hours":    await get_effective_hours(),
-        "services": await get_effective_services(),
-    })
+    etag = await _data_etag("settings")
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    return await _admin_json(request, {
+        "info":     await get_storage().get_effective_clinic_info(),
+        "hours":    await get_storage().get_effective_hours(),
+        "services": await get_storage().get_effective_services(),
+    }, etag)
 
 
 @app.post("/api/settings")
 async def api_save_settings(request: Request, _: None = Depends(_verify_admin)):
     """Save one or more settings sections. Accepts {info?, hours?, services?}."""
     body = await request.json()
-    if "info"     in body: await set_setting("clinic_info",     json.dumps(body["info"]))
-    if "hours"    in body: await set_setting("clinic_hours",    json.dumps(body["hours"]))
-    if "services" in body: await set_setting("clinic_services", json.dumps(body["services"]))
+    values: dict[str, str] = {}
+    if "info"     in body: values["clinic_info"]     = json.dumps(body["info"])
+    if "hours"    in body: values["clinic_hours"]    = json.dumps(body["hours"])
+    if "services" in body: values["clinic_services"] = json.dumps(body["services"])
+    # One transaction for all sections; set_settings bumps the settings
+    # version so cached hours/services are reloaded on the next read.
+    if values:
+        await get_storage().set_settings(values)
     return JSONResponse({"ok": True})
@@ -0,0 +1,122 @@
+"""Admin authentication: password hashing, verified-credential cache, session tokens.
+
+The admin password is stored as a PBKDF2 hash (200,000 iterations), which
+takes tens of milliseconds to check, so the hash always runs in a worker
+thread. Successful checks are remembered in a small LRU keyed by an HMAC of
+the password and bound to the stored hash, so repeated Basic requests skip
+PBKDF2 entirely.
+
+POST /api/admin/login exchanges Basic credentials for a signed token
+(``<expiry>.<signature>``) that the admin UI then sends as a Bearer token.
+POST /api/admin/refresh trades a still-valid token for a new one, which the
+UI does at half the token's lifetime, so an open dashboard stays signed in.
+The signature covers the stored password hash, so changing the password
+revokes every outstanding token. Set ADMIN_TOKEN_SECRET when running more
+than one worker; otherwise each process signs with its own random key.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+from .storage import get_storage
+
+ADMIN_USERNAME = "admin"
+ADMIN_TOKEN_TTL = int(os.getenv("ADMIN_TOKEN_TTL", "3600"))
+AUTH_CACHE_SIZE = 32
+PBKDF2_ITERATIONS = 200_000
+
+_secret = os.getenv("ADMIN_TOKEN_SECRET", "").encode() or secrets.token_bytes(32)
+_cache_key = secrets.token_bytes(32)
+_verified: OrderedDict[bytes, str] = OrderedDict()     # password digest -> stored hash
+
+
+# ---------------------------------------------------------------------------
+# Password hashing
+# ---------------------------------------------------------------------------
+
+def hash_password(plain: str) -> str:
+    """Return a PBKDF2-SHA256 hash string: '<salt_hex>:<dk_hex>'."""
+    salt = os.urandom(32)
+    dk = hashlib.pbkdf2_hmac("sha256", plain.encode(), salt, PBKDF2_ITERATIONS)
+    return salt.hex() + ":" + dk.hex()
+
+
+def verify_hash(plain: str, stored: str) -> bool:
+    """Verify *plain* against a stored PBKDF2 hash string."""
+    try:
+        salt_hex, dk_hex = stored.split(":", 1)
+        salt = bytes.fromhex(salt_hex)
+        dk = hashlib.pbkdf2_hmac("sha256", plain.encode(), salt, PBKDF2_ITERATIONS)
+        return hmac.compare_digest(dk.hex(), dk_hex)
+    except Exception:
+        return False
+
+
+async def _stored_password() -> tuple[str | None, str]:
+    """(stored hash or None, value tokens are bound to)."""
+    hashed = await get_storage().get_setting("admin_password")
+    if hashed:
+        return hashed, hashed
+    # Plain-text env var / default until a password has been set
+    return None, "plain:" + os.getenv("ADMIN_PASSWORD", "admin123")
+
+
+async def check_password(plain: str) -> bool:
+    """Return True if *plain* matches the stored admin password."""
+    hashed, binding = await _stored_password()
+    if hashed is None:
+        return secrets.compare_digest(plain.encode(), binding[6:].encode())
+
+    digest = hmac.digest(_cache_key, plain.encode(), "sha256")
+    if _verified.get(digest) == hashed:
+        _verified.move_to_end(digest)
+        return True
+    if not await asyncio.to_thread(verify_hash, plain, hashed):
+        return False
+    _verified[digest] = hashed
+    if len(_verified) > AUTH_CACHE_SIZE:
+        _verified.popitem(last=False)
+    return True
+
+
+async def check_credentials(username: str, password: str) -> bool:
+    username_ok = secrets.compare_digest(username.encode(), ADMIN_USERNAME.encode())
+    password_ok = await check_password(password)
+    return username_ok and password_ok
+
+
+async def set_password(plain: str) -> None:
+    """Store a new admin password; forgets cached checks and revokes tokens."""
+    hashed = await asyncio.to_thread(hash_password, plain)
+    await get_storage().set_setting("admin_password", hashed)
+    _verified.clear()
+
+
+# ---------------------------------------------------------------------------
+# Session tokens
+# ---------------------------------------------------------------------------
+
+def _sign(expires: int, binding: str) -> str:
+    return hmac.new(_secret, f"{expires}|{binding}".encode(), "sha256").hexdigest()
+
+
+async def issue_token() -> str:
+    """A token valid for ADMIN_TOKEN_TTL seconds or until the password changes."""
+    _, binding = await _stored_password()
+    expires = int(time.time()) + ADMIN_TOKEN_TTL
+    return f"{expires}.{_sign(expires, binding)}"
+
+
+async def verify_token(token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    _, binding = await _stored_password()
+    # Compare bytes: str compare_digest raises TypeError on non-ASCII input.
+    expected = _sign(int(expires), binding)
+    return hmac.compare_digest(signature.encode(), expected.encode())
@@ -0,0 +1,162 @@
+"""Duration-aware availability engine built on per-day occupancy bitmaps.
+
+A day is modelled as a Python int where bit *i* stands for the 5-minute
+unit starting at minute ``i * UNIT_MIN`` after midnight. Opening hours and
+confirmed bookings (with their service durations) are OR-ed into masks, and
+"which starts fit an N-minute block" is answered with a handful of shifts
+and ANDs instead of comparing every candidate against every booking.
+"""
+
+import re
+
+UNIT_MIN = 5            # bitmap resolution in minutes
+SLOT_STEP_MIN = 30      # offered start times are on this grid from opening
+DEFAULT_DURATION_MIN = 60
+
+# Used when an hours string can't be parsed (matches the original behaviour).
+_FALLBACK_WINDOWS = {"Saturday": (9 * 60, 13 * 60)}
+_FALLBACK_WINDOW = (9 * 60, 17 * 60)
+
+_TIME_RE = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*([AaPp]\.?[Mm]\.?)?")
+
+
+# ---------------------------------------------------------------------------
+# Parsing helpers
+# ---------------------------------------------------------------------------
+
+def parse_hhmm(t: str) -> int:
+    """Return minutes after midnight for a 24-h 'HH:MM' string."""
+    h, m = t.split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+def fmt_hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _parse_clock(hour: str, minute: str | None, meridiem: str | None) -> int:
+    h, m = int(hour), int(minute or 0)
+    if meridiem:
+        pm = meridiem[0].lower() == "p"
+        h = h % 12 + (12 if pm else 0)
+    return h * 60 + m
+
+
+def open_window(day_name: str, hours: dict) -> tuple[int, int] | None:
+    """Return (open_min, close_min) for *day_name*, or None if closed.
+
+    Understands the free-text format used in settings, e.g.
+    '9:00 AM – 5:00 PM' or '09:00-17:00'.
+    """
+    text = str(hours.get(day_name, "Closed")).strip()
+    if not text or text.lower().startswith("closed"):
+        return None
+    times = _TIME_RE.findall(text)
+    if len(times) >= 2:
+        start = _parse_clock(*times[0])
+        end = _parse_clock(*times[1])
+        if 0 <= start < end <= 24 * 60:
+            return start, end
+    return _FALLBACK_WINDOWS.get(day_name, _FALLBACK_WINDOW)
+
+
+def service_duration(services: dict, service: str) -> int:
+    """Duration in minutes for a service key (unknown services count as 60)."""
+    try:
+        duration = int(services.get(service, {}).get("duration_min", DEFAULT_DURATION_MIN))
+    except (TypeError, ValueError):
+        duration = DEFAULT_DURATION_MIN
+    return duration if duration > 0 else DEFAULT_DURATION_MIN
+
+
+# ---------------------------------------------------------------------------
+# Bitmap primitives
+# ---------------------------------------------------------------------------
+
+def _units(minutes: int) -> int:
+    """Round a duration up to whole bitmap units."""
+    return -(-minutes // UNIT_MIN)
+
+
+def span_mask(start_min: int, duration_min: int) -> int:
+    """Mask covering [start_min, start_min + duration_min)."""
+    first = start_min // UNIT_MIN
+    last = _units(start_min + duration_min)
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+
+def fit_mask(free: int, duration_min: int) -> int:
+    """Bits *i* such that units i .. i+k-1 are all free (k = duration in units).
+
+    Uses shift doubling, so the cost is O(log k) big-int operations.
+    """
+    k = _units(duration_min)
+    fit, span = free, 1
+    while span < k:
+        step = min(span, k - span)
+        fit &= fit >> step
+        span += step
+    return fit
+
+
+def _bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# ---------------------------------------------------------------------------
+# Day schedule
+# ---------------------------------------------------------------------------
+
+class DaySchedule:
+    """Opening window plus occupied units for a single date."""
+
+    __slots__ = ("open_min", "close_min", "open_mask", "busy")
+
+    def __init__(self, window: tuple[int, int]) -> None:
+        self.open_min, self.close_min = window
+        # Only units that lie entirely inside the window count as open.
+        first, last = _units(self.open_min), self.close_min // UNIT_MIN
+        self.open_mask = ((1 << (last - first)) - 1) << first if last > first else 0
+        self.busy = 0
+
+    def book(self, start_min: int, duration_min: int) -> None:
+        self.busy |= span_mask(start_min, duration_min)
+
+    def starts(self, duration_min: int) -> int:
+        """Mask of every unit at which a block of *duration_min* fits."""
+        return fit_mask(self.open_mask & ~self.busy, duration_min)
+
+    def fits(self, start_min: int, duration_min: int) -> bool:
+        """True if [start, start + duration) is open and touches no booking."""
+        block = span_mask(start_min, duration_min)
+        return bool(block) and not block & ~(self.open_mask & ~self.busy)
+
+    def slots(self, duration_min: int, step_min: int = SLOT_STEP_MIN) -> list[str]:
+        """Start times (HH:MM) on the *step_min* grid where the block fits."""
+        grid = 0
+        for m in range(_units(self.open_min) * UNIT_MIN, self.close_min, step_min):
+            grid |= 1 << (m // UNIT_MIN)
+        return [fmt_hhmm(u * UNIT_MIN) for u in _bits(self.starts(duration_min) & grid)]
+
+
+def build_day(
+    day_name: str,
+    hours: dict,
+    services: dict,
+    bookings,
+) -> DaySchedule | None:
+    """Build a DaySchedule from (time, service) pairs, or None if closed."""
+    window = open_window(day_name, hours)
+    if window is None:
+        return None
+    day = DaySchedule(window)
+    for time_str, service in bookings:
+        try:
+            start = parse_hhmm(time_str)
+        except (ValueError, AttributeError):
+            continue
+        day.book(start, service_duration(services, service))
+    return day
@@ -0,0 +1,154 @@
+"""Token-budgeted compaction of conversation history.
+
+Every model call resends the whole history, including bulky tool results
+(slot lists, appointment tables). Before each call the agent runs
+compact_history(), which leaves history untouched while it fits the budget
+and otherwise shrinks it to COMPACT_TARGET of the budget in three stages,
+stopping as soon as it fits:
+
+1. Availability lookups repeated later with the same arguments are stubbed.
+2. Tool results older than the last KEEP_RECENT_TURNS user turns are
+   collapsed to a one-line summary.
+3. The oldest whole turns (a user message plus everything up to the next
+   one) are dropped; the current turn is always kept.
+
+Blocks are rewritten or whole turns removed, never split, so every tool_use
+keeps its matching tool_result. Compacting well below the budget means it
+happens rarely, which keeps the cached prompt prefix stable in between.
+"""
+
+import json
+import os
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "20000"))
+COMPACT_TARGET = 0.6      # fraction of the budget to shrink to once over it
+KEEP_RECENT_TURNS = 2     # user turns whose tool results are kept verbatim
+SUMMARY_CHARS = 160
+CHARS_PER_TOKEN = 4       # rough estimate; avoids a count_tokens round trip
+
+AVAILABILITY_TOOLS = frozenset({"check_availability", "find_next_available"})
+
+_SUPERSEDED = "[superseded by a later lookup with the same arguments]"
+_TRIMMED = "[earlier result, trimmed] "
+
+
+# ---------------------------------------------------------------------------
+# Token estimate
+# ---------------------------------------------------------------------------
+
+def _block_chars(block) -> int:
+    if isinstance(block, str):
+        return len(block)
+    btype = block.get("type")
+    if btype == "text":
+        return len(block["text"])
+    if btype == "tool_use":
+        return len(block["name"]) + len(json.dumps(block.get("input", {})))
+    if btype == "tool_result":
+        content = block.get("content", "")
+        if isinstance(content, str):
+            return len(content)
+        return sum(_block_chars(b) for b in content)
+    if btype == "thinking":
+        return len(block.get("thinking", ""))
+    return 0
+
+
+def estimate_tokens(messages: list) -> int:
+    """Approximate token count of *messages* (about four characters per token)."""
+    chars = 0
+    for message in messages:
+        content = message["content"]
+        chars += 16  # role and block framing
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(_block_chars(b) for b in content)
+    return chars // CHARS_PER_TOKEN
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _turn_starts(history: list) -> list[int]:
+    """Indexes of messages typed by the patient (not tool results)."""
+    return [
+        i for i, m in enumerate(history)
+        if m["role"] == "user" and isinstance(m["content"], str)
+    ]
+
+
+def _tool_calls(history: list) -> dict[str, tuple[str, str]]:
+    """tool_use id → (tool name, canonical JSON of its input)."""
+    calls = {}
+    for message in history:
+        if message["role"] != "assistant" or isinstance(message["content"], str):
+            continue
+        for block in message["content"]:
+            if block.get("type") == "tool_use":
+                calls[block["id"]] = (
+                    block["name"],
+                    json.dumps(block.get("input", {}), sort_keys=True),
+                )
+    return calls
+
+
+def _tool_results(history: list, end: int | None = None):
+    for message in history[:end]:
+        if message["role"] != "user" or isinstance(message["content"], str):
+            continue
+        for block in message["content"]:
+            if block.get("type") == "tool_result" and isinstance(block.get("content"), str):
+                yield block
+
+
+def _summarize(text: str) -> str:
+    if len(text) <= SUMMARY_CHARS or text.startswith(_TRIMMED) or text == _SUPERSEDED:
+        return text
+    head = " ".join(text[:SUMMARY_CHARS].split())
+    return f"{_TRIMMED}{head} … ({len(text)} chars)"
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+def compact_history(history: list, budget: int = HISTORY_TOKEN_BUDGET) -> bool:
+    """Shrink *history* in place if it exceeds *budget* tokens. Returns True if changed."""
+    if budget <= 0 or estimate_tokens(history) <= budget:
+        return False
+    target = int(budget * COMPACT_TARGET)
+    calls = _tool_calls(history)
+
+    # 1. Superseded availability lookups
+    latest: dict[tuple[str, str], str] = {}
+    for block in _tool_results(history):
+        call = calls.get(block["tool_use_id"])
+        if call and call[0] in AVAILABILITY_TOOLS:
+            latest[call] = block["tool_use_id"]
+    for block in _tool_results(history):
+        call = calls.get(block["tool_use_id"])
+        if call in latest and latest[call] != block["tool_use_id"]:
+            block["content"] = _SUPERSEDED
+    if estimate_tokens(history) <= target:
+        return True
+
+    # 2. Collapse tool results outside the recent turns
+    turns = _turn_starts(history)
+    recent = turns[-KEEP_RECENT_TURNS] if len(turns) >= KEEP_RECENT_TURNS else 0
+    for block in _tool_results(history, recent):
+        block["content"] = _summarize(block["content"])
+    total = estimate_tokens(history)
+    if total <= target:
+        return True
+
+    # 3. Drop the oldest whole turns, always keeping the latest one
+    drop = 0
+    for nxt in turns[1:]:
+        if total <= target:
+            break
+        total -= estimate_tokens(history[drop:nxt])
+        drop = nxt
+    del history[:drop]
+    return True
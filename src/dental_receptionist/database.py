@@ -1,79 +1,183 @@
 """SQLite database helpers using aiosqlite."""
 
+import asyncio
+import base64
+import functools
 import json as _json
+import os
+import re
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 import aiosqlite
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from .availability import (
+    build_day,
+    fmt_hhmm,
+    open_window,
+    parse_hhmm,
+    service_duration,
+)
+from .metrics import DB_QUERY_SECONDS
+from .migrations import migrate
 
 DB_PATH = "dental.db"
 
+# Upper bound on the window find_next_available will scan.
+MAX_SEARCH_DAYS = 60
 
-async def init_db() -> None:
-    """Create tables if they don't exist."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS patients (
-                id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                name       TEXT    NOT NULL,
-                phone      TEXT    NOT NULL,
-                email      TEXT,
-                created_at TEXT    DEFAULT (datetime('now'))
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS appointments (
-                id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                patient_id INTEGER NOT NULL REFERENCES patients(id),
-                service    TEXT    NOT NULL,
-                date       TEXT    NOT NULL,
-                time       TEXT    NOT NULL,
-                status     TEXT    NOT NULL DEFAULT 'confirmed',
-                reason     TEXT,
-                created_at TEXT    DEFAULT (datetime('now'))
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key   TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
-        """)
-        await db.commit()
-        # Migration: add reminder_24h_sent column if it doesn't exist yet
+# Number of read-only connections kept open alongside the single writer.
+DB_READERS = int(os.getenv("DB_READERS", "4"))
+
+# Applied to every pooled connection. WAL lets readers proceed while the
+# writer holds its lock; synchronous=NORMAL is durable enough under WAL.
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",       # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 134217728",     # 128 MB memory-mapped I/O
+)
+
+
+# ---------------------------------------------------------------------------
+# Connection pool
+# ---------------------------------------------------------------------------
+
+class ConnectionPool:
+    """One shared writer connection plus a fixed set of reader connections.
+
+    Writes are serialized behind an asyncio lock so a transaction started by
+    one coroutine is never interleaved with another's statements. Readers are
+    handed out exclusively from a queue and returned when the caller is done.
+    """
+
+    def __init__(self, path: str, readers: int = DB_READERS) -> None:
+        self.path = path
+        self.readers = max(1, readers)
+        self._writer: aiosqlite.Connection | None = None
+        self._write_lock = asyncio.Lock()
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._conns: list[aiosqlite.Connection] = []
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        conn.row_factory = aiosqlite.Row
+        for pragma in _PRAGMAS:
+            await conn.execute(pragma)
+        self._conns.append(conn)
+        return conn
+
+    async def open(self) -> None:
+        # Open the writer first so WAL mode is in place before readers attach.
+        self._writer = await self._connect()
+        for _ in range(self.readers):
+            conn = await self._connect()
+            await conn.execute("PRAGMA query_only = ON")
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            # Refresh planner statistics for long-running processes.
+            await self._writer.execute("PRAGMA optimize")
+        for conn in self._conns:
+            await conn.close()
+        self._conns.clear()
+        self._writer = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection for the duration of the block."""
+        conn = await self._idle.get()
         try:
-            await db.execute(
-                "ALTER TABLE appointments ADD COLUMN reminder_24h_sent INTEGER NOT NULL DEFAULT 0"
-            )
-            await db.commit()
-        except Exception:
-            pass  # Column already exists on subsequent startups
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Hold the writer connection exclusively; rolls back on error."""
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = asyncio.Lock()
+
+
+async def open_pool() -> ConnectionPool:
+    """Open the shared pool for DB_PATH (no-op if it is already open)."""
+    global _pool
+    async with _pool_lock:
+        if _pool is None:
+            pool = ConnectionPool(DB_PATH)
+            await pool.open()
+            _pool = pool
+    return _pool
+
+
+async def close_pool() -> None:
+    """Close every pooled connection."""
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            _pool = None
+
+
+@asynccontextmanager
+async def _reader() -> AsyncIterator[aiosqlite.Connection]:
+    pool = _pool or await open_pool()
+    async with pool.reader() as db:
+        yield db
+
+
+@asynccontextmanager
+async def _writer() -> AsyncIterator[aiosqlite.Connection]:
+    pool = _pool or await open_pool()
+    async with pool.writer() as db:
+        yield db
+
+
+def _timed(fn):
+    """Record each call's duration in the db_query_seconds histogram."""
+    hist = DB_QUERY_SECONDS.labels(query=fn.__name__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            hist.observe(time.perf_counter() - started)
+
+    return wrapper
 
 
 # ---------------------------------------------------------------------------
-# Patients
+# Schema
 # ---------------------------------------------------------------------------
 
-async def get_or_create_patient(name: str, phone: str, email: str) -> int:
-    """Return existing patient id (matched by phone) or insert a new one."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            "SELECT id FROM patients WHERE phone = ?", (phone,)
-        ) as cur:
-            row = await cur.fetchone()
-        if row:
-            return row[0]
-        cur = await db.execute(
-            "INSERT INTO patients (name, phone, email) VALUES (?, ?, ?)",
-            (name, phone, email),
-        )
-        await db.commit()
-        return cur.lastrowid
+async def init_db() -> None:
+    """Create or upgrade the schema to the latest migration."""
+    async with _writer() as db:
+        await migrate(db)
 
 
 # ---------------------------------------------------------------------------
 # Appointments
 # ---------------------------------------------------------------------------
 
+@_timed
 async def get_slots(date_str: str, service_type: str) -> list[str]:
     """Return available HH:MM time slots for the given date and service."""
     hours = await get_effective_hours()
@@ -85,37 +189,70 @@ async def get_slots(date_str: str, service_type: str) -> list[str]:
         return []
 
     day_name = d.strftime("%A")
-    day_hours = hours.get(day_name, "Closed")
-    if day_hours == "Closed":
+    if open_window(day_name, hours) is None:
         return []
 
-    # Clinic open window
-    if day_name == "Saturday":
-        open_h, close_h = 9, 13
-    else:
-        open_h, close_h = 9, 17
-
-    duration = services.get(service_type, {}).get("duration_min", 60)
-
-    # Generate candidate slots (30-min grid)
-    candidates: list[str] = []
-    cur_min = open_h * 60
-    end_min = close_h * 60
-    while cur_min + duration <= end_min:
-        candidates.append(f"{cur_min // 60:02d}:{cur_min % 60:02d}")
-        cur_min += 30
-
-    # Remove already-booked slots on that date
-    async with aiosqlite.connect(DB_PATH) as db:
+    # Load the day's bookings with their services so each one blocks its
+    # full duration, not just its start time.
+    async with _reader() as db:
         async with db.execute(
-            "SELECT time FROM appointments WHERE date = ? AND status = 'confirmed'",
+            "SELECT time, service FROM appointments WHERE date = ? AND status = 'confirmed'",
             (date_str,),
         ) as cur:
-            booked = {row[0] async for row in cur}
+            booked = [(row[0], row[1]) async for row in cur]
+
+    day = build_day(day_name, hours, services, booked)
+    return day.slots(service_duration(services, service_type))
 
-    return [s for s in candidates if s not in booked]
 
+@_timed
+async def find_next_available(
+    service_type: str,
+    from_date: str,
+    days: int = 7,
+    limit: int = 5,
+) -> list[dict]:
+    """Return up to *limit* openings ({date, time}) in the *days* from *from_date*.
+
+    All confirmed bookings in the range come back from one indexed range
+    query; openings are then computed per day in memory.
+    """
+    hours = await get_effective_hours()
+    services = await get_effective_services()
+
+    try:
+        start = datetime.strptime(from_date, "%Y-%m-%d").date()
+    except ValueError:
+        return []
+    days = max(1, min(days, MAX_SEARCH_DAYS))
+    end = start + timedelta(days=days - 1)
 
+    booked: dict[str, list[tuple[str, str]]] = defaultdict(list)
+    async with _reader() as db:
+        async with db.execute(
+            """SELECT date, time, service FROM appointments
+               WHERE date BETWEEN ? AND ? AND status = 'confirmed'""",
+            (start.isoformat(), end.isoformat()),
+        ) as cur:
+            async for row in cur:
+                booked[row[0]].append((row[1], row[2]))
+
+    duration = service_duration(services, service_type)
+    openings: list[dict] = []
+    for offset in range(days):
+        d = start + timedelta(days=offset)
+        date_str = d.isoformat()
+        day = build_day(d.strftime("%A"), hours, services, booked.get(date_str, ()))
+        if day is None:
+            continue
+        for slot in day.slots(duration):
+            openings.append({"date": date_str, "time": slot})
+            if len(openings) >= limit:
+                return openings
+    return openings
+
+
+@_timed
 async def create_appointment(
     patient_name: str,
     patient_phone: str,
@@ -124,42 +261,99 @@ async def create_appointment(
     date_str: str,
     time_str: str,
 ) -> dict:
-    """Insert a confirmed appointment and return its id."""
-    patient_id = await get_or_create_patient(patient_name, patient_phone, patient_email)
-    async with aiosqlite.connect(DB_PATH) as db:
-        cur = await db.execute(
-            """INSERT INTO appointments (patient_id, service, date, time, status)
-               VALUES (?, ?, ?, ?, 'confirmed')""",
-            (patient_id, service, date_str, time_str),
+    """Book a confirmed appointment in a single transaction.
+
+    Patient upsert, overlap check and insert all run inside one
+    BEGIN IMMEDIATE on the writer connection, so two sessions can't both
+    take a slot they were shown. Returns ``{"id", "patient_id"}`` on
+    success, or ``{"conflict": True, "reason", "available"}`` when the
+    requested block doesn't fit (``available`` lists that day's openings).
+    """
+    hours = await get_effective_hours()
+    services = await get_effective_services()
+    duration = service_duration(services, service)
+
+    try:
+        d = datetime.strptime(date_str, "%Y-%m-%d")
+        start = parse_hhmm(time_str)
+    except (ValueError, AttributeError):
+        return {"conflict": True, "reason": "invalid date or time", "available": []}
+    time_str = fmt_hhmm(start)
+
+    async with _writer() as db:
+        await db.execute("BEGIN IMMEDIATE")
+        await db.execute(
+            "INSERT INTO patients (name, phone, email) VALUES (?, ?, ?) "
+            "ON CONFLICT(phone) DO NOTHING",
+            (patient_name, patient_phone, patient_email),
         )
+        async with db.execute(
+            "SELECT id FROM patients WHERE phone = ?", (patient_phone,)
+        ) as cur:
+            patient_id = (await cur.fetchone())[0]
+
+        async with db.execute(
+            "SELECT time, service FROM appointments WHERE date = ? AND status = 'confirmed'",
+            (date_str,),
+        ) as cur:
+            booked = [(row[0], row[1]) async for row in cur]
+        day = build_day(d.strftime("%A"), hours, services, booked)
+
+        conflict = None
+        if day is None:
+            conflict = {"conflict": True, "reason": "clinic closed", "available": []}
+        elif not day.fits(start, duration):
+            conflict = {"conflict": True, "reason": "slot unavailable",
+                        "available": day.slots(duration)}
+        else:
+            try:
+                cur = await db.execute(
+                    """INSERT INTO appointments (patient_id, service, date, time, status)
+                       VALUES (?, ?, ?, ?, 'confirmed')""",
+                    (patient_id, service, date_str, time_str),
+                )
+            except sqlite3.IntegrityError:
+                # Backstop trigger: another process booked this exact start.
+                conflict = {"conflict": True, "reason": "slot unavailable",
+                            "available": day.slots(duration)}
+
+        if conflict:
+            await db.rollback()
+            return conflict
         await db.commit()
         return {"id": cur.lastrowid, "patient_id": patient_id}
 
 
-async def cancel_appointment(appointment_id: int, reason: str) -> bool:
-    """Set appointment status to cancelled. Returns True if a row was updated."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cur = await db.execute(
+@_timed
+async def cancel_appointment(appointment_id: int, reason: str) -> str | None:
+    """Set appointment status to cancelled. Returns its date if a row was updated."""
+    async with _writer() as db:
+        async with db.execute(
             """UPDATE appointments
                SET status = 'cancelled', reason = ?
-               WHERE id = ? AND status = 'confirmed'""",
+               WHERE id = ? AND status = 'confirmed'
+               RETURNING date""",
             (reason, appointment_id),
-        )
+        ) as cur:
+            row = await cur.fetchone()
         await db.commit()
-        return cur.rowcount > 0
+        return row[0] if row else None
 
 
+@_timed
 async def get_patient_appointments(patient_name: str, patient_phone: str) -> list[dict]:
     """Return all appointments for a patient matched by name (partial) and phone."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    # The unique phone index narrows this to a single patient row, so the
+    # LIKE only ever checks one name; an FTS lookup here measured ~10x slower
+    # (see benchmarks/bench_search.py).
+    async with _reader() as db:
         async with db.execute(
             """SELECT a.id, a.service, a.date, a.time, a.status
                FROM appointments a
                JOIN patients p ON a.patient_id = p.id
-               WHERE p.name LIKE ? AND p.phone = ?
+               WHERE p.phone = ? AND p.name LIKE ?
                ORDER BY a.date, a.time""",
-            (f"%{patient_name}%", patient_phone),
+            (patient_phone, f"%{patient_name}%"),
         ) as cur:
             rows = await cur.fetchall()
     return [dict(r) for r in rows]
@@ -169,9 +363,66 @@ async def get_patient_appointments(patient_name: str, patient_phone: str) -> lis
 # Settings
 # ---------------------------------------------------------------------------
 
-async def get_setting(key: str) -> str | None:
-    """Return the value for a settings key, or None if not found."""
-    async with aiosqlite.connect(DB_PATH) as db:
+# Parsed settings are cached in-process and stamped with the shared
+# settings version (data_versions row, bumped by triggers on every write).
+# Saves made in this process drop the cache at once; the shared row is
+# re-checked at most every SETTINGS_RECHECK_MS, so a save made by another
+# worker is seen within that interval and warm reads do no I/O at all.
+SETTINGS_RECHECK_MS = int(os.getenv("SETTINGS_RECHECK_MS", "1000"))
+
+_settings_cache: dict[str, object] = {}
+_settings_cache_version: int | None = None
+_settings_checked_at = 0.0          # time.monotonic() of the last version check
+_settings_generation = 0            # bumped by invalidate_settings_cache()
+
+
+async def get_data_version(name: str) -> int:
+    """Current value of a shared change counter in data_versions."""
+    async with _reader() as db:
+        async with db.execute(
+            "SELECT version FROM data_versions WHERE name = ?", (name,)
+        ) as cur:
+            row = await cur.fetchone()
+    return row[0] if row else 0
+
+
+def invalidate_settings_cache() -> None:
+    """Forget cached settings; the next read re-checks the shared version."""
+    global _settings_cache_version, _settings_generation
+    _settings_cache.clear()
+    _settings_cache_version = None
+    _settings_generation += 1
+
+
+async def _cached_setting(key: str, load):
+    """Return the cached value for *key*, calling *load()* on a miss."""
+    global _settings_cache_version, _settings_checked_at
+    now = time.monotonic()
+    if (_settings_cache_version is None
+            or now - _settings_checked_at >= SETTINGS_RECHECK_MS / 1000):
+        generation = _settings_generation
+        version = await get_data_version("settings")
+        # A local save during the check wins; its invalidation stands.
+        if generation == _settings_generation:
+            _settings_checked_at = now
+            if version != _settings_cache_version:
+                _settings_cache.clear()
+                _settings_cache_version = version
+    if key in _settings_cache:
+        return _settings_cache[key]
+    generation = _settings_generation
+    version = _settings_cache_version
+    value = await load()
+    # A write racing load() invalidates or moves the version, so don't keep it.
+    if (version is not None and generation == _settings_generation
+            and version == _settings_cache_version):
+        _settings_cache[key] = value
+    return value
+
+
+@_timed
+async def _load_setting(key: str) -> str | None:
+    async with _reader() as db:
         async with db.execute(
             "SELECT value FROM settings WHERE key = ?", (key,)
         ) as cur:
@@ -179,21 +430,32 @@ async def get_setting(key: str) -> str | None:
     return row[0] if row else None
 
 
+async def get_setting(key: str) -> str | None:
+    """Return the value for a settings key, or None if not found."""
+    return await _cached_setting("raw:" + key, lambda: _load_setting(key))
+
+
 async def set_setting(key: str, value: str) -> None:
     """Upsert a key-value pair in the settings table."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
+    await set_settings({key: value})
+
+
+@_timed
+async def set_settings(values: dict[str, str]) -> None:
+    """Upsert several settings in one transaction (triggers bump the version)."""
+    async with _writer() as db:
+        await db.executemany(
             "INSERT INTO settings (key, value) VALUES (?, ?) "
             "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
-            (key, value),
+            list(values.items()),
         )
         await db.commit()
+    invalidate_settings_cache()
 
 
-async def get_effective_clinic_info() -> dict:
-    """Return clinic info from DB, falling back to config.py defaults."""
+def parse_clinic_info(raw: str | None) -> dict:
+    """Clinic info from a stored JSON value, falling back to config.py defaults."""
     from .config import CLINIC_NAME, CLINIC_ADDRESS, CLINIC_PHONE, CLINIC_EMAIL
-    raw = await get_setting("clinic_info")
     if raw:
         try:
             return _json.loads(raw)
@@ -203,10 +465,9 @@ async def get_effective_clinic_info() -> dict:
             "phone": CLINIC_PHONE, "email": CLINIC_EMAIL}
 
 
-async def get_effective_hours() -> dict:
-    """Return clinic hours from DB, falling back to config.py defaults."""
+def parse_hours(raw: str | None) -> dict:
+    """Clinic hours from a stored JSON value, falling back to config.py defaults."""
     from .config import HOURS
-    raw = await get_setting("clinic_hours")
     if raw:
         try:
             return _json.loads(raw)
@@ -215,10 +476,9 @@ async def get_effective_hours() -> dict:
     return dict(HOURS)
 
 
-async def get_effective_services() -> dict:
-    """Return services dict from DB, falling back to config.py defaults."""
+def parse_services(raw: str | None) -> dict:
+    """Services from a stored JSON value, falling back to config.py defaults."""
     from .config import SERVICES
-    raw = await get_setting("clinic_services")
     if raw:
         try:
             return _json.loads(raw)
@@ -227,10 +487,34 @@ async def get_effective_services() -> dict:
     return {k: dict(v) for k, v in SERVICES.items()}
 
 
+# The get_effective_* helpers return shared cached objects — treat them as
+# read-only and copy before mutating.
+
+async def get_effective_clinic_info() -> dict:
+    """Return clinic info from DB, falling back to config.py defaults."""
+    async def load() -> dict:
+        return parse_clinic_info(await _load_setting("clinic_info"))
+    return await _cached_setting("clinic_info", load)
+
+
+async def get_effective_hours() -> dict:
+    """Return clinic hours from DB, falling back to config.py defaults."""
+    async def load() -> dict:
+        return parse_hours(await _load_setting("clinic_hours"))
+    return await _cached_setting("clinic_hours", load)
+
+
+async def get_effective_services() -> dict:
+    """Return services dict from DB, falling back to config.py defaults."""
+    async def load() -> dict:
+        return parse_services(await _load_setting("clinic_services"))
+    return await _cached_setting("clinic_services", load)
+
+
+@_timed
 async def get_pending_24h_reminders() -> list[dict]:
     """Return confirmed appointments due tomorrow that haven't had a reminder sent."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _reader() as db:
         async with db.execute(
             """SELECT a.id, a.service, a.date, a.time,
                       p.name, p.phone, p.email
@@ -244,9 +528,10 @@ async def get_pending_24h_reminders() -> list[dict]:
     return [dict(r) for r in rows]
 
 
+@_timed
 async def mark_reminder_sent(appointment_id: int) -> None:
     """Set reminder_24h_sent = 1 for an appointment."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _writer() as db:
         await db.execute(
             "UPDATE appointments SET reminder_24h_sent = 1 WHERE id = ?",
             (appointment_id,),
@@ -254,12 +539,110 @@ async def mark_reminder_sent(appointment_id: int) -> None:
         await db.commit()
 
 
-async def get_all_appointments(
-    date_filter: str | None = None,
-    status_filter: str | None = None,
-    search: str | None = None,
-) -> list[dict]:
-    """Return all appointments, optionally filtered by date, status, or patient name."""
+@_timed
+async def get_daily_stats(from_date: str, to_date: str) -> list[dict]:
+    """Return non-zero (date, service, status, count) rows in the date range."""
+    async with _reader() as db:
+        async with db.execute(
+            """SELECT date, service, status, count FROM daily_stats
+               WHERE date BETWEEN ? AND ? AND count > 0
+               ORDER BY date""",
+            (from_date, to_date),
+        ) as cur:
+            rows = await cur.fetchall()
+    return [dict(r) for r in rows]
+
+
+async def get_stats_summary(from_date: str, to_date: str) -> dict:
+    """Dashboard summary built from daily_stats — O(days), not O(appointments)."""
+    hours = await get_effective_hours()
+    services = await get_effective_services()
+    rows = await get_daily_stats(from_date, to_date)
+    return summarize_daily_stats(rows, from_date, to_date, hours, services)
+
+
+def summarize_daily_stats(
+    rows: list[dict],
+    from_date: str,
+    to_date: str,
+    hours: dict,
+    services: dict,
+) -> dict:
+    """Fold (date, service, status, count) rows into the /api/stats payload.
+
+    Per day: counts by status and service, minutes booked by confirmed
+    appointments, and utilization against that day's opening hours.
+    """
+    days: dict[str, dict] = {}
+    by_status: dict[str, int] = defaultdict(int)
+    by_service: dict[str, int] = defaultdict(int)
+    for r in rows:
+        day = days.get(r["date"])
+        if day is None:
+            day = days[r["date"]] = {
+                "date": r["date"], "total": 0, "by_status": {}, "by_service": {},
+                "booked_minutes": 0,
+            }
+        n = r["count"]
+        day["total"] += n
+        day["by_status"][r["status"]] = day["by_status"].get(r["status"], 0) + n
+        day["by_service"][r["service"]] = day["by_service"].get(r["service"], 0) + n
+        if r["status"] == "confirmed":
+            day["booked_minutes"] += n * service_duration(services, r["service"])
+        by_status[r["status"]] += n
+        by_service[r["service"]] += n
+
+    for day in days.values():
+        try:
+            window = open_window(datetime.strptime(day["date"], "%Y-%m-%d").strftime("%A"), hours)
+        except ValueError:
+            window = None
+        open_minutes = window[1] - window[0] if window else 0
+        day["open_minutes"] = open_minutes
+        day["utilization"] = (
+            round(day["booked_minutes"] / open_minutes, 3) if open_minutes else None
+        )
+
+    total = sum(by_status.values())
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "days": list(days.values()),
+        "totals": {
+            "total": total,
+            "by_status": dict(by_status),
+            "by_service": dict(by_service),
+            "cancellation_rate": round(by_status.get("cancelled", 0) / total, 3) if total else None,
+        },
+    }
+
+
+def fts_query(text: str, column: str | None = None) -> str | None:
+    """Turn free text into an FTS5 MATCH expression of prefix terms.
+
+    Every word must match the start of some token ('jan do' finds
+    'Jane Doe'); *column* restricts matching to one column. Returns None
+    when the text has no searchable words.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    scope = f"{column} : " if column else ""
+    return " ".join(f'{scope}"{w}"*' for w in words)
+
+
+def _appointments_query(
+    date_filter: str | None,
+    status_filter: str | None,
+    search: str | None,
+    after: tuple[str, str, int] | None = None,
+    limit: int | None = None,
+) -> tuple[str, list]:
+    """Build the admin listing query, ordered by (date DESC, time, id).
+
+    *after* is the (date, time, id) of the last row already returned; rows
+    strictly after it in listing order are selected (keyset pagination).
+    """
     query = """
         SELECT a.id, p.name AS patient_name, p.phone, p.email,
                a.service, a.date, a.time, a.status, a.created_at
@@ -276,15 +659,114 @@ async def get_all_appointments(
         conditions.append("a.status = ?")
         params.append(status_filter)
     if search:
-        conditions.append("p.name LIKE ?")
-        params.append(f"%{search}%")
+        match = fts_query(search)
+        if match:
+            conditions.append(
+                "a.patient_id IN (SELECT rowid FROM patients_fts WHERE patients_fts MATCH ?)"
+            )
+            params.append(match)
+        else:
+            # A search with no searchable words matches nothing, not everything.
+            conditions.append("0")
+    if after:
+        # Mixed sort directions rule out a row-value comparison; the leading
+        # a.date <= ? gives the planner a range on the listing index.
+        d, t, i = after
+        conditions.append(
+            "a.date <= ? AND (a.date < ? OR (a.date = ? AND "
+            "(a.time > ? OR (a.time = ? AND a.id > ?))))"
+        )
+        params += [d, d, d, t, t, i]
 
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
-    query += " ORDER BY a.date DESC, a.time ASC"
+    query += " ORDER BY a.date DESC, a.time ASC, a.id ASC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque pagination cursor for the position just after *row*."""
+    raw = _json.dumps([row["date"], row["time"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        d, t, i = _json.loads(raw)
+        return str(d), str(t), int(i)
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+@_timed
+async def get_all_appointments(
+    date_filter: str | None = None,
+    status_filter: str | None = None,
+    search: str | None = None,
+) -> list[dict]:
+    """Return all appointments, optionally filtered by date, status, or patient search.
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    *search* matches word prefixes in the patient's name, phone or email.
+    """
+    query, params = _appointments_query(date_filter, status_filter, search)
+    async with _reader() as db:
         async with db.execute(query, params) as cur:
             rows = await cur.fetchall()
     return [dict(r) for r in rows]
+
+
+@_timed
+async def get_appointments_page(
+    date_filter: str | None = None,
+    status_filter: str | None = None,
+    search: str | None = None,
+    cursor: str | None = None,
+    limit: int = 100,
+) -> dict:
+    """Return one page of appointments plus the cursor for the next page.
+
+    Result shape: ``{"items": [...], "next_cursor": str | None}``.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    query, params = _appointments_query(date_filter, status_filter, search, after, limit + 1)
+    async with _reader() as db:
+        async with db.execute(query, params) as cur:
+            rows = [dict(r) for r in await cur.fetchall()]
+    more = len(rows) > limit
+    items = rows[:limit]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if more else None,
+    }
+
+
+async def iter_appointments(
+    date_filter: str | None = None,
+    status_filter: str | None = None,
+    search: str | None = None,
+    batch_size: int = 500,
+) -> AsyncIterator[dict]:
+    """Yield appointments in listing order, one keyset batch at a time.
+
+    Each batch borrows a reader and returns it before yielding, so a slow
+    consumer never holds a pooled connection.
+    """
+    after = None
+    while True:
+        query, params = _appointments_query(
+            date_filter, status_filter, search, after, batch_size
+        )
+        async with _reader() as db:
+            async with db.execute(query, params) as cur:
+                rows = [dict(r) for r in await cur.fetchall()]
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]
+        after = (last["date"], last["time"], last["id"])
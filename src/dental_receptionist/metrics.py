@@ -0,0 +1,241 @@
+"""Minimal in-process metrics exposed in Prometheus text format at /metrics.
+
+Counters and histograms are plain Python objects updated in place; callback
+metrics read live state (tool cache, admission queue, session store) at
+scrape time.
+Recording is a dict lookup plus a few additions, cheap enough for every
+tool call and query. Children returned by ``labels()`` can be bound once
+at import time to skip the lookup on hot paths.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REGISTRY: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------------------------
+# Counter
+# ---------------------------------------------------------------------------
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()) -> None:
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self.labels()       # unlabelled counters are exported from 0
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.labels(**labels).inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(child.value)}"
+
+
+# ---------------------------------------------------------------------------
+# Histogram
+# ---------------------------------------------------------------------------
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: tuple) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        # Observations also come from executor threads (SMTP sends).
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        return self.labels(**labels).time()
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = _labels(self.labelnames, key, f'le="{bound}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {count}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {count}"
+
+
+# ---------------------------------------------------------------------------
+# Callback metrics (values read from existing stats at scrape time)
+# ---------------------------------------------------------------------------
+
+class CallbackMetric(_Metric):
+    """*fn* returns {label-values tuple: value}; use () as the key when unlabelled."""
+
+    def __init__(self, name: str, help: str, fn, labelnames: tuple = (),
+                 kind: str = "gauge") -> None:
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        for key, value in self.fn().items():
+            key = tuple(str(k) for k in key)
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(value)}"
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text exposition format 0.0.4."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+MODEL_TTFT_SECONDS = Histogram(
+    "model_ttft_seconds", "Time from request to first streamed content block.",
+    ("tier", "model"),
+)
+MODEL_STREAM_SECONDS = Histogram(
+    "model_stream_seconds", "Total time of one streamed model call.",
+    ("tier", "model"),
+)
+MODEL_TOKENS_TOTAL = Counter(
+    "model_tokens_total", "Tokens reported by the API, by tier and kind.",
+    ("tier", "kind"),
+)
+MODEL_ERRORS_TOTAL = Counter(
+    "model_errors_total", "Chat turns that ended with an error.", ("tier",),
+)
+MODEL_ESCALATIONS_TOTAL = Counter(
+    "model_escalations_total", "Sessions moved to a larger tier, by source tier.", ("tier",),
+)
+CHAT_TURNS_TOTAL = Counter(
+    "chat_turns_total", "Chat turns by path (fast = answered without the model).", ("path",),
+)
+CHAT_REJECTED_TOTAL = Counter(
+    "chat_rejected_total", "Chat turns shed by admission control (answered 429).",
+)
+FAST_PATH_REQUESTS_TOTAL = Counter(
+    "fast_path_requests_total", "Chat messages checked by the fast path, by result and topic.",
+    ("result", "topic"),
+)
+CHAT_TOOL_LOOPS = Histogram(
+    "chat_tool_loops", "Model calls per chat turn.", buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15),
+)
+SESSIONS_STARTED_TOTAL = Counter(
+    "sessions_started_total", "Chat turns that started a new (or expired) session.",
+)
+TOOL_SECONDS = Histogram("tool_seconds", "Tool handler duration.", ("tool",))
+TOOL_ERRORS_TOTAL = Counter("tool_errors_total", "Tool calls that failed.", ("tool",))
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds", "database.py call duration, including pool waits.", ("query",),
+)
+SMTP_SEND_SECONDS = Histogram(
+    "smtp_send_seconds", "Booking confirmation email send time.", ("outcome",),
+)
+TRANSCRIBE_SECONDS = Histogram(
+    "transcribe_seconds", "Whisper transcription request time.", ("outcome",),
+)
+TRANSCRIBE_WAIT_SECONDS = Histogram(
+    "transcribe_wait_seconds", "Time spent waiting for a transcription slot.",
+)
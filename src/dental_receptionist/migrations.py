@@ -0,0 +1,330 @@
+"""Versioned schema migrations tracked by SQLite's PRAGMA user_version."""
+
+import logging
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Migrations — append only. Each step runs in its own transaction and bumps
+# user_version to its 1-based position in MIGRATIONS.
+# ---------------------------------------------------------------------------
+
+async def _base_tables(db: aiosqlite.Connection) -> None:
+    """Patients, appointments and settings (IF NOT EXISTS for pre-versioned DBs)."""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS patients (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            name       TEXT    NOT NULL,
+            phone      TEXT    NOT NULL,
+            email      TEXT,
+            created_at TEXT    DEFAULT (datetime('now'))
+        )
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS appointments (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INTEGER NOT NULL REFERENCES patients(id),
+            service    TEXT    NOT NULL,
+            date       TEXT    NOT NULL,
+            time       TEXT    NOT NULL,
+            status     TEXT    NOT NULL DEFAULT 'confirmed',
+            reason     TEXT,
+            created_at TEXT    DEFAULT (datetime('now'))
+        )
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+
+async def _reminder_flag(db: aiosqlite.Connection) -> None:
+    """Add appointments.reminder_24h_sent (older DBs may already have it)."""
+    async with db.execute("PRAGMA table_info(appointments)") as cur:
+        columns = {row[1] async for row in cur}
+    if "reminder_24h_sent" not in columns:
+        await db.execute(
+            "ALTER TABLE appointments ADD COLUMN reminder_24h_sent INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+async def _hot_path_indexes(db: aiosqlite.Connection) -> None:
+    """Indexes for slot lookups, patient matching, reminders and admin listing."""
+    # Patients are matched by phone; fold any duplicates left by earlier
+    # racing inserts into the oldest row before enforcing uniqueness.
+    await db.execute("""
+        UPDATE appointments
+        SET patient_id = (
+            SELECT MIN(p2.id) FROM patients p1
+            JOIN patients p2 ON p2.phone = p1.phone
+            WHERE p1.id = appointments.patient_id
+        )
+        WHERE patient_id NOT IN (SELECT MIN(id) FROM patients GROUP BY phone)
+    """)
+    await db.execute(
+        "DELETE FROM patients WHERE id NOT IN (SELECT MIN(id) FROM patients GROUP BY phone)"
+    )
+    await db.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_patients_phone ON patients(phone)"
+    )
+    # get_slots: WHERE date = ? AND status = 'confirmed' → covering on time
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_appointments_date_status_time "
+        "ON appointments(date, status, time)"
+    )
+    # get_patient_appointments: JOIN on patient_id, ORDER BY date, time
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_appointments_patient "
+        "ON appointments(patient_id, date, time)"
+    )
+    # get_all_appointments: ORDER BY date DESC, time ASC without a sort step
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_appointments_listing "
+        "ON appointments(date DESC, time, id)"
+    )
+    # get_pending_24h_reminders: only unsent confirmed rows are indexed
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_appointments_reminder_pending "
+        "ON appointments(date) WHERE status = 'confirmed' AND reminder_24h_sent = 0"
+    )
+    await db.execute("ANALYZE")
+
+
+async def _slot_index_with_service(db: aiosqlite.Connection) -> None:
+    """Make the get_slots index cover service so durations need no table lookup."""
+    await db.execute("DROP INDEX IF EXISTS idx_appointments_date_status_time")
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_appointments_date_status_time "
+        "ON appointments(date, status, time, service)"
+    )
+
+
+async def _no_double_booking(db: aiosqlite.Connection) -> None:
+    """Reject a second confirmed booking with the same date and start time.
+
+    create_appointment does the full duration-aware overlap check inside its
+    transaction; this trigger is the schema-level backstop. A trigger is used
+    rather than a unique index so existing duplicate rows don't block the
+    upgrade.
+    """
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_appointments_no_double_booking
+        BEFORE INSERT ON appointments
+        WHEN NEW.status = 'confirmed' AND EXISTS (
+            SELECT 1 FROM appointments
+            WHERE date = NEW.date AND status = 'confirmed' AND time = NEW.time
+        )
+        BEGIN
+            SELECT RAISE(ABORT, 'appointment slot already booked');
+        END
+    """)
+
+
+async def _patient_search_fts(db: aiosqlite.Connection) -> None:
+    """FTS5 index over patient name, phone and email, kept in sync by triggers."""
+    await db.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+            name, phone, email,
+            content = 'patients',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_patients_fts_insert
+        AFTER INSERT ON patients BEGIN
+            INSERT INTO patients_fts (rowid, name, phone, email)
+            VALUES (new.id, new.name, new.phone, new.email);
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_patients_fts_delete
+        AFTER DELETE ON patients BEGIN
+            INSERT INTO patients_fts (patients_fts, rowid, name, phone, email)
+            VALUES ('delete', old.id, old.name, old.phone, old.email);
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_patients_fts_update
+        AFTER UPDATE ON patients BEGIN
+            INSERT INTO patients_fts (patients_fts, rowid, name, phone, email)
+            VALUES ('delete', old.id, old.name, old.phone, old.email);
+            INSERT INTO patients_fts (rowid, name, phone, email)
+            VALUES (new.id, new.name, new.phone, new.email);
+        END
+    """)
+    await db.execute("INSERT INTO patients_fts (patients_fts) VALUES ('rebuild')")
+
+
+async def _daily_stats(db: aiosqlite.Connection) -> None:
+    """Per (date, service, status) appointment counts maintained by triggers."""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            date    TEXT    NOT NULL,
+            service TEXT    NOT NULL,
+            status  TEXT    NOT NULL,
+            count   INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, service, status)
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_insert
+        AFTER INSERT ON appointments BEGIN
+            INSERT INTO daily_stats (date, service, status, count)
+            VALUES (new.date, new.service, new.status, 1)
+            ON CONFLICT (date, service, status) DO UPDATE SET count = count + 1;
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_update
+        AFTER UPDATE OF date, service, status ON appointments
+        WHEN old.date IS NOT new.date
+          OR old.service IS NOT new.service
+          OR old.status IS NOT new.status
+        BEGIN
+            UPDATE daily_stats SET count = count - 1
+            WHERE date = old.date AND service = old.service AND status = old.status;
+            INSERT INTO daily_stats (date, service, status, count)
+            VALUES (new.date, new.service, new.status, 1)
+            ON CONFLICT (date, service, status) DO UPDATE SET count = count + 1;
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_delete
+        AFTER DELETE ON appointments BEGIN
+            UPDATE daily_stats SET count = count - 1
+            WHERE date = old.date AND service = old.service AND status = old.status;
+        END
+    """)
+    await db.execute("DELETE FROM daily_stats")
+    await db.execute("""
+        INSERT INTO daily_stats (date, service, status, count)
+        SELECT date, service, status, COUNT(*) FROM appointments
+        GROUP BY date, service, status
+    """)
+
+
+async def _settings_version(db: aiosqlite.Connection) -> None:
+    """Shared change counter for settings, bumped by triggers on every write.
+
+    Settings are cached per process; the counter lets every worker notice a
+    save made by any other one.
+    """
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name    TEXT    PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    await db.execute("INSERT OR IGNORE INTO data_versions (name) VALUES ('settings')")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        await db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_settings_version_{event.lower()}
+            AFTER {event} ON settings BEGIN
+                UPDATE data_versions SET version = version + 1 WHERE name = 'settings';
+            END
+        """)
+
+
+async def _chat_sessions(db: aiosqlite.Connection) -> None:
+    """Chat sessions for SESSION_STORE=sqlite, indexed by last use for eviction."""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            id         TEXT PRIMARY KEY,
+            data       TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated "
+        "ON chat_sessions(updated_at)"
+    )
+
+
+async def _appointments_version(db: aiosqlite.Connection) -> None:
+    """Shared change counter for the admin appointment listing.
+
+    Bumped on anything the listing shows: bookings, cancellations and
+    other appointment edits, and patient name or contact changes. The
+    reminder flag is left out.
+    """
+    await db.execute("INSERT OR IGNORE INTO data_versions (name) VALUES ('appointments')")
+    bump = "UPDATE data_versions SET version = version + 1 WHERE name = 'appointments';"
+    for name, event in (
+        ("appointments_version_insert", "INSERT ON appointments"),
+        ("appointments_version_delete", "DELETE ON appointments"),
+        ("appointments_version_update",
+         "UPDATE OF patient_id, service, date, time, status, reason ON appointments"),
+        ("patients_version_update", "UPDATE OF name, phone, email ON patients"),
+    ):
+        await db.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{name} AFTER {event} BEGIN {bump} END"
+        )
+
+
+async def _drop_reminder_index(db: aiosqlite.Connection) -> None:
+    """Drop the partial reminder index; the planner never picks it.
+
+    get_pending_24h_reminders matches one date, which
+    idx_appointments_date_status_time already narrows to a handful of rows,
+    so the partial index only added work to every appointment write.
+    """
+    await db.execute("DROP INDEX IF EXISTS idx_appointments_reminder_pending")
+
+
+MIGRATIONS = [
+    _base_tables,
+    _reminder_flag,
+    _hot_path_indexes,
+    _slot_index_with_service,
+    _no_double_booking,
+    _patient_search_fts,
+    _daily_stats,
+    _settings_version,
+    _chat_sessions,
+    _appointments_version,
+    _drop_reminder_index,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    async with db.execute("PRAGMA user_version") as cur:
+        row = await cur.fetchone()
+    return row[0]
+
+
+async def migrate(db: aiosqlite.Connection, target: int | None = None) -> int:
+    """Apply pending migrations up to *target* (default: latest). Returns the new version."""
+    target = SCHEMA_VERSION if target is None else target
+    version = await get_schema_version(db)
+    while version < target:
+        step = MIGRATIONS[version]
+        await db.execute("BEGIN IMMEDIATE")
+        # Another connection (worker, session store) may have migrated
+        # while this one waited for the write lock.
+        if await get_schema_version(db) > version:
+            await db.commit()
+            version = await get_schema_version(db)
+            continue
+        try:
+            await step(db)
+            await db.execute(f"PRAGMA user_version = {version + 1}")
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+        version += 1
+        logger.info("Applied schema migration %d (%s)", version, step.__name__)
+    return version
@@ -2,7 +2,7 @@
 
 import logging
 
-from .database import get_pending_24h_reminders, mark_reminder_sent
+from .storage import get_storage
 from .whatsapp import send_booking_confirmation
 
 logger = logging.getLogger(__name__)
@@ -13,7 +13,7 @@ async def send_24h_reminders() -> None:
     Query appointments due tomorrow with no reminder sent yet,
     email each patient, then mark the reminder as sent.
     """
-    rows = await get_pending_24h_reminders()
+    rows = await get_storage().get_pending_24h_reminders()
     if not rows:
         return
 
@@ -29,7 +29,7 @@ async def send_24h_reminders() -> None:
             patient_email=row["email"] or "",
         )
         if ok:
-            await mark_reminder_sent(row["id"])
+            await get_storage().mark_reminder_sent(row["id"])
             logger.info("Reminder sent for appointment #%d", row["id"])
         else:
             logger.warning(
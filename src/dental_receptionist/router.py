@@ -0,0 +1,105 @@
+"""Deterministic fast path for purely informational questions.
+
+Messages like "what are your hours?" or "is there parking?" are answered
+directly from the same data get_clinic_info returns, skipping the model and
+tool round trips. Matching is deliberately conservative: the message must be
+short, hit exactly one topic, and mention nothing that needs the model
+(bookings, dates, symptoms). Anything else falls through to the agent.
+So does every message sent while a flow is pending: an answer like "Delta
+Dental" or "cash" to the agent's own question belongs to that flow, not
+to the FAQ.
+
+Disable with FAST_PATH=0.
+"""
+
+import os
+import re
+
+from .metrics import FAST_PATH_REQUESTS_TOTAL
+from .tools import TOOL_HANDLERS
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH", "1") != "0"
+MAX_WORDS = 15
+
+# topic (as understood by get_clinic_info) → trigger pattern
+INTENTS: dict[str, re.Pattern] = {
+    topic: re.compile(pattern, re.IGNORECASE)
+    for topic, pattern in {
+        "hours":        r"\b(hours|opening times?|open|opens|close|closes|closed|closing)\b",
+        "location":     r"\b(address|located|location|where are you|directions?)\b",
+        "services":     r"\b(services|treatments|procedures|prices?|pricing|costs?|how much)\b",
+        "insurance":    r"\b(insurance|insured|delta dental|cigna|aetna|metlife)\b",
+        "parking":      r"\b(park|parking)\b",
+        "cancellation": r"\b(cancellation (policy|fee)|late fee)\b",
+        "payment":      r"\b(payments?|pay|credit cards?|debit cards?|cash|financing|carecredit)\b",
+        "xrays":        r"\bx-?rays?\b",
+        "new_patient":  r"\bnew patients?\b",
+    }.items()
+}
+
+# Anything that hints at an action, a specific date or a clinical concern
+# needs the model (and possibly a tool with arguments).
+_NEEDS_AGENT = re.compile(
+    r"\b(book|booking|appointments?|schedule|reschedule|cancel|available|availability|"
+    r"slots?|today|tomorrow|tonight|next|my|pain|hurts?|bleeding|swollen|emergency|"
+    r"broken|chipped|\d{1,2}(:\d{2})?\s*(am|pm)|\d{4}-\d{2}-\d{2})\b",
+    re.IGNORECASE,
+)
+
+# Closing questions that don't leave anything pending.
+_CLOSING = re.compile(r"\banything else\b", re.IGNORECASE)
+
+_GREETING = "Hi, thanks for reaching out! "
+_FOLLOW_UP = "\n\nIs there anything else I can help you with?"
+
+
+def flow_pending(history: list) -> bool:
+    """True if the last assistant turn used tools or ended on a question."""
+    turn = []
+    for msg in reversed(history):
+        if msg["role"] == "user" and isinstance(msg["content"], str):
+            break
+        turn.append(msg)
+    if not turn:
+        # No reply since the last patient message (an interrupted turn).
+        return bool(history)
+    if turn[0]["role"] != "assistant":
+        return True
+    for msg in turn:
+        if isinstance(msg["content"], list) and any(
+            block.get("type") in ("tool_use", "tool_result") for block in msg["content"]
+        ):
+            return True
+    content = turn[0]["content"]
+    if isinstance(content, list):
+        content = "".join(b.get("text", "") for b in content if b.get("type") == "text")
+    last_line = content.strip().rsplit("\n", 1)[-1]
+    return "?" in last_line and not _CLOSING.search(last_line)
+
+
+def match_intent(message: str, history: list = ()) -> str | None:
+    """Return the single informational topic *message* asks about, or None."""
+    if len(message.split()) > MAX_WORDS or _NEEDS_AGENT.search(message):
+        return None
+    if flow_pending(history):
+        return None
+    topics = [topic for topic, pattern in INTENTS.items() if pattern.search(message)]
+    return topics[0] if len(topics) == 1 else None
+
+
+async def fast_reply(message: str, history: list) -> str | None:
+    """Answer *message* locally if it is a high-confidence FAQ/hours query."""
+    if not FAST_PATH_ENABLED:
+        return None
+    topic = match_intent(message, history)
+    if topic is None:
+        FAST_PATH_REQUESTS_TOTAL.inc(result="miss", topic="")
+        return None
+    try:
+        answer = await TOOL_HANDLERS["get_clinic_info"](topic=topic)
+    except Exception:
+        # Let the agent handle it (and report the error) the usual way.
+        FAST_PATH_REQUESTS_TOTAL.inc(result="miss", topic=topic)
+        return None
+    FAST_PATH_REQUESTS_TOTAL.inc(result="hit", topic=topic)
+    return ("" if history else _GREETING) + answer + _FOLLOW_UP
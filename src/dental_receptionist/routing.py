@@ -0,0 +1,113 @@
+"""Model tiers and the policy that picks one per turn.
+
+MODEL_ROUTING selects the policy:
+
+- ``tiered`` (default): turns start on the fast tier and move to the large
+  tier when the conversation looks complex (long or multi-part messages,
+  clinical or dispute keywords, long sessions) or a tool call fails.
+  Escalation sticks for the rest of the session, so the prompt cache, which
+  is per model, is not thrown away by switching back and forth.
+- ``large`` / ``fast``: always use that tier.
+
+Model ids and token limits come from MODEL_LARGE / MODEL_FAST and
+MAX_TOKENS_LARGE / MAX_TOKENS_FAST.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+
+from .metrics import (
+    MODEL_ERRORS_TOTAL,
+    MODEL_ESCALATIONS_TOTAL,
+    MODEL_STREAM_SECONDS,
+    MODEL_TOKENS_TOTAL,
+    MODEL_TTFT_SECONDS,
+)
+
+
+@dataclass(frozen=True)
+class Tier:
+    name: str
+    model: str
+    max_tokens: int
+
+
+LARGE = Tier(
+    "large",
+    os.getenv("MODEL_LARGE", "claude-opus-4-6"),
+    int(os.getenv("MAX_TOKENS_LARGE", "8096")),
+)
+FAST = Tier(
+    "fast",
+    os.getenv("MODEL_FAST", "claude-haiku-4-5"),
+    int(os.getenv("MAX_TOKENS_FAST", "1024")),
+)
+TIERS = {tier.name: tier for tier in (FAST, LARGE)}
+
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "tiered").lower()
+
+COMPLEX_WORDS = 60          # longer messages go to the large tier
+COMPLEX_TURNS = 12          # so do sessions with more patient messages than this
+
+_COMPLEX = re.compile(
+    r"\b(pain|hurts?|bleeding|swollen|swelling|infection|fever|medication|allerg\w*|"
+    r"pregnan\w*|emergency|complain\w*|refund|dispute|claim|reschedul\w*|several|multiple)\b",
+    re.IGNORECASE,
+)
+
+
+def is_complex(message: str, history: list) -> bool:
+    if len(message.split()) > COMPLEX_WORDS or message.count("?") >= 2:
+        return True
+    if _COMPLEX.search(message):
+        return True
+    turns = sum(1 for m in history if m["role"] == "user" and isinstance(m["content"], str))
+    return turns > COMPLEX_TURNS
+
+
+def choose_tier(session: dict, message: str) -> Tier:
+    """Tier for a new turn; marks the session escalated when it goes large."""
+    if MODEL_ROUTING in TIERS:
+        return TIERS[MODEL_ROUTING]
+    if session.get("escalated") or is_complex(message, session["history"]):
+        session["escalated"] = True
+        return LARGE
+    return FAST
+
+
+def escalate(session: dict, tier: Tier) -> Tier:
+    """Tier to continue with after a failed tool call."""
+    if MODEL_ROUTING != "tiered":
+        return tier
+    session["escalated"] = True
+    return LARGE
+
+
+# ---------------------------------------------------------------------------
+# Per-tier metrics (exported at /metrics)
+# ---------------------------------------------------------------------------
+
+_TOKEN_KINDS = {
+    "input_tokens": "input",
+    "output_tokens": "output",
+    "cache_read_input_tokens": "cache_read",
+    "cache_creation_input_tokens": "cache_creation",
+}
+
+
+def record_call(tier: Tier, seconds: float, ttft: float | None, usage) -> None:
+    MODEL_STREAM_SECONDS.observe(seconds, tier=tier.name, model=tier.model)
+    if ttft is not None:
+        MODEL_TTFT_SECONDS.observe(ttft, tier=tier.name, model=tier.model)
+    if usage is not None:
+        for field, kind in _TOKEN_KINDS.items():
+            MODEL_TOKENS_TOTAL.inc(getattr(usage, field, None) or 0, tier=tier.name, kind=kind)
+
+
+def record_error(tier: Tier) -> None:
+    MODEL_ERRORS_TOTAL.inc(tier=tier.name)
+
+
+def record_escalation(tier: Tier) -> None:
+    MODEL_ESCALATIONS_TOTAL.inc(tier=tier.name)
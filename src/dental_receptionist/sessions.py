@@ -0,0 +1,235 @@
+"""Chat session stores: in-memory (default) or SQLite-backed.
+
+A session is a JSON-serializable dict holding at least ``history``. Stores
+keep an expiry index so finding stale sessions never walks every live one:
+
+- InMemorySessionStore orders sessions by last use in an OrderedDict, so
+  expired sessions are always at the front and are popped in O(1) each.
+- SQLiteSessionStore indexes ``updated_at`` and deletes stale rows with one
+  range delete. Sessions survive restarts and can be shared by several
+  uvicorn workers pointing at the same database file. Its table comes from
+  the schema migrations; ``load`` only reads, and ``save`` refreshes
+  ``updated_at`` at the end of each turn.
+
+Eviction is amortized: ``load`` runs it at most once per EVICT_INTERVAL, and
+the app also schedules ``evict_expired`` as a background job.
+
+Select the backend with SESSION_STORE=memory|sqlite (SESSION_DB_PATH
+overrides the SQLite file, defaulting to the main database).
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Protocol
+
+import aiosqlite
+
+from .migrations import migrate
+
+SESSION_EXPIRY = 7200   # 2 hours in seconds
+EVICT_INTERVAL = 60     # seconds between opportunistic eviction passes
+
+
+def new_session() -> dict:
+    return {"history": []}
+
+
+class SessionStore(Protocol):
+    async def open(self) -> None: ...
+    async def close(self) -> None: ...
+    async def load(self, session_id: str) -> dict:
+        """Return the live session, or a new one if it is missing or expired."""
+    async def get(self, session_id: str) -> dict | None:
+        """Return the session without touching its expiry, or None."""
+    async def save(self, session_id: str, session: dict) -> None: ...
+    async def evict_expired(self) -> int:
+        """Drop expired sessions; returns how many were removed."""
+
+
+# ---------------------------------------------------------------------------
+# In-memory
+# ---------------------------------------------------------------------------
+
+class InMemorySessionStore:
+    """Process-local sessions ordered by last use (oldest first)."""
+
+    def __init__(self, expiry: float = SESSION_EXPIRY) -> None:
+        self.expiry = expiry
+        self._sessions: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._last_evict = 0.0
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def load(self, session_id: str) -> dict:
+        now = time.time()
+        if now - self._last_evict >= EVICT_INTERVAL:
+            await self.evict_expired()
+        entry = self._sessions.pop(session_id, None)
+        session = entry[1] if entry and now - entry[0] <= self.expiry else new_session()
+        self._sessions[session_id] = (now, session)
+        return session
+
+    async def get(self, session_id: str) -> dict | None:
+        entry = self._sessions.get(session_id)
+        return entry[1] if entry else None
+
+    async def save(self, session_id: str, session: dict) -> None:
+        # load() hands out the live dict, so there is nothing to copy back;
+        # just make sure a session created elsewhere is tracked.
+        if session_id not in self._sessions:
+            self._sessions[session_id] = (time.time(), session)
+
+    async def evict_expired(self) -> int:
+        now = time.time()
+        self._last_evict = now
+        cutoff = now - self.expiry
+        removed = 0
+        while self._sessions:
+            sid, (ts, _) = next(iter(self._sessions.items()))
+            if ts >= cutoff:
+                break
+            del self._sessions[sid]
+            removed += 1
+        return removed
+
+
+# ---------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------
+
+class SQLiteSessionStore:
+    """Sessions persisted as JSON rows, indexed by last use."""
+
+    def __init__(self, path: str, expiry: float = SESSION_EXPIRY) -> None:
+        self.path = path
+        self.expiry = expiry
+        self._db: aiosqlite.Connection | None = None
+        # One connection serves every coroutine; keep execute/commit pairs whole.
+        self._lock = asyncio.Lock()
+        self._last_evict = 0.0
+
+    async def open(self) -> None:
+        async with self._lock:
+            await self._open()
+
+    async def _open(self) -> None:
+        if self._db is not None:
+            return
+        db = await aiosqlite.connect(self.path)
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.execute("PRAGMA busy_timeout = 5000")
+        await migrate(db)
+        self._db = db
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._db is not None:
+                await self._db.close()
+                self._db = None
+
+    @asynccontextmanager
+    async def _conn(self):
+        async with self._lock:
+            await self._open()
+            yield self._db
+
+    async def load(self, session_id: str) -> dict:
+        now = time.time()
+        if now - self._last_evict >= EVICT_INTERVAL:
+            await self.evict_expired()
+        async with self._conn() as db:
+            async with db.execute(
+                "SELECT data, updated_at FROM chat_sessions WHERE id = ?", (session_id,)
+            ) as cur:
+                row = await cur.fetchone()
+        if row and now - row[1] <= self.expiry:
+            return json.loads(row[0])
+        return new_session()
+
+    async def get(self, session_id: str) -> dict | None:
+        async with self._conn() as db:
+            async with db.execute(
+                "SELECT data FROM chat_sessions WHERE id = ?", (session_id,)
+            ) as cur:
+                row = await cur.fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def save(self, session_id: str, session: dict) -> None:
+        data = json.dumps(session)
+        async with self._conn() as db:
+            await db.execute(
+                "INSERT INTO chat_sessions (id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (session_id, data, time.time()),
+            )
+            await db.commit()
+
+    async def evict_expired(self) -> int:
+        now = time.time()
+        self._last_evict = now
+        async with self._conn() as db:
+            cur = await db.execute(
+                "DELETE FROM chat_sessions WHERE updated_at < ?", (now - self.expiry,)
+            )
+            await db.commit()
+        return cur.rowcount
+
+
+def create_session_store(name: str | None = None, expiry: float = SESSION_EXPIRY) -> SessionStore:
+    """Build the store named by *name* or $SESSION_STORE (default 'memory')."""
+    name = (name or os.getenv("SESSION_STORE", "memory")).lower()
+    if name == "memory":
+        return InMemorySessionStore(expiry)
+    if name == "sqlite":
+        from .database import DB_PATH
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", DB_PATH), expiry)
+    raise ValueError(f"Unknown SESSION_STORE {name!r}; expected 'memory' or 'sqlite'")
+
+
+# ---------------------------------------------------------------------------
+# Per-session serialization
+# ---------------------------------------------------------------------------
+
+class SessionClaim:
+    """A session's in-flight turn. release() is idempotent so every exit path may call it."""
+
+    __slots__ = ("_locks", "session_id", "_released")
+
+    def __init__(self, locks: "SessionLocks", session_id: str) -> None:
+        self._locks = locks
+        self.session_id = session_id
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._locks._busy.discard(self.session_id)
+
+
+class SessionLocks:
+    """At most one turn in flight per session id; a second one is refused, not queued."""
+
+    def __init__(self) -> None:
+        self._busy: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._busy)
+
+    def claim(self, session_id: str) -> SessionClaim | None:
+        """Claim *session_id* for one turn; None if a turn is already in flight."""
+        if session_id in self._busy:
+            return None
+        self._busy.add(session_id)
+        return SessionClaim(self, session_id)
@@ -0,0 +1,79 @@
+"""Server-sent events encoding with text-delta coalescing.
+
+The model streams text a few characters at a time. Instead of one
+``data:`` frame (and one socket write) per delta, SSEEmitter buffers text
+and emits it as a single frame once SSE_FLUSH_CHARS characters have built
+up or the oldest buffered delta is SSE_FLUSH_MS old. Any other event
+flushes pending text first, so ordering is unchanged. Frames are returned
+as ready-to-write bytes; SSE_EVENT_IDS=1 adds an ``id:`` line to each.
+
+The time threshold is checked whenever text arrives and on poll(), which
+the agent calls for every upstream event.
+"""
+
+import json
+import os
+import time
+
+SSE_FLUSH_CHARS = int(os.getenv("SSE_FLUSH_CHARS", "256"))
+SSE_FLUSH_MS = float(os.getenv("SSE_FLUSH_MS", "20"))
+SSE_EVENT_IDS = os.getenv("SSE_EVENT_IDS", "0") == "1"
+
+
+def encode_event(payload: dict, event_id: int | None = None) -> bytes:
+    data = json.dumps(payload, separators=(",", ":"))
+    if event_id is None:
+        return f"data: {data}\n\n".encode()
+    return f"id: {event_id}\ndata: {data}\n\n".encode()
+
+
+class SSEEmitter:
+    __slots__ = ("flush_chars", "flush_s", "event_ids", "_parts", "_size", "_since", "_next_id")
+
+    def __init__(
+        self,
+        flush_chars: int = SSE_FLUSH_CHARS,
+        flush_ms: float = SSE_FLUSH_MS,
+        event_ids: bool = SSE_EVENT_IDS,
+    ) -> None:
+        self.flush_chars = flush_chars
+        self.flush_s = flush_ms / 1000
+        self.event_ids = event_ids
+        self._parts: list[str] = []
+        self._size = 0
+        self._since = 0.0
+        self._next_id = 0
+
+    def _frame(self, payload: dict) -> bytes:
+        if not self.event_ids:
+            return encode_event(payload)
+        self._next_id += 1
+        return encode_event(payload, self._next_id)
+
+    def text(self, chunk: str) -> bytes:
+        """Buffer a text delta; returns a frame when a threshold is reached, else b''."""
+        if not self._parts:
+            self._since = time.monotonic()
+        self._parts.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self.flush_chars or time.monotonic() - self._since >= self.flush_s:
+            return self.flush()
+        return b""
+
+    def poll(self) -> bytes:
+        """Flush buffered text if it has waited past the time threshold."""
+        if self._parts and time.monotonic() - self._since >= self.flush_s:
+            return self.flush()
+        return b""
+
+    def flush(self) -> bytes:
+        if not self._parts:
+            return b""
+        frame = self._frame({"type": "text", "chunk": "".join(self._parts)})
+        self._parts.clear()
+        self._size = 0
+        return frame
+
+    def event(self, payload: dict) -> bytes:
+        """Pending text (if any) followed by a non-text event, as one write."""
+        return self.flush() + self._frame(payload)
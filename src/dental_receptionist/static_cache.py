@@ -0,0 +1,151 @@
+"""In-memory cache for the files under STATIC_DIR.
+
+Every file is read once (at startup, or on first use), hashed for a strong
+ETag, and stored next to precompressed gzip and, when the optional
+``brotli`` package is installed, brotli variants. Requests are then served
+from memory: If-None-Match answers 304 without a body, and the encoding is
+picked from Accept-Encoding with no per-request compression.
+
+HTML is sent with ``Cache-Control: no-cache`` so browsers always revalidate
+(a cheap 304); other assets may be reused for STATIC_MAX_AGE seconds.
+STATIC_RELOAD=1 watches the directory (needs ``watchfiles``) and reloads
+the cache on change, for development.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "300"))
+STATIC_RELOAD = os.getenv("STATIC_RELOAD", "0") == "1"
+
+_COMPRESSIBLE = {".html", ".js", ".css", ".svg", ".json", ".txt", ".map"}
+_MIN_COMPRESS = 256             # bytes; smaller bodies are sent as-is
+
+
+@dataclass
+class StaticFile:
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    variants: dict[str, bytes] = field(default_factory=dict)    # encoding -> body
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings from Accept-Encoding, minus any with q=0."""
+    out = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        out.add(coding.strip())
+    return out
+
+
+def etag_matches(header: str, etags: set[str]) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.removeprefix("W/") in etags:
+            return True
+    return False
+
+
+class StaticCache:
+    def __init__(self, root: Path, max_age: int = STATIC_MAX_AGE) -> None:
+        self.root = root
+        self.max_age = max_age
+        self._files: dict[str, StaticFile] | None = None
+
+    def load(self) -> None:
+        """Read and compress every file under root, replacing the current set."""
+        files = {}
+        for path in sorted(self.root.rglob("*")):
+            if path.is_file():
+                files[path.relative_to(self.root).as_posix()] = self._build(path)
+        self._files = files
+        logger.info("Loaded %d static files from %s", len(files), self.root)
+
+    def _build(self, path: Path) -> StaticFile:
+        body = path.read_bytes()
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        if path.suffix == ".html":
+            cache_control = "no-cache"
+        else:
+            cache_control = f"public, max-age={self.max_age}"
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        variants = {}
+        if path.suffix in _COMPRESSIBLE and len(body) >= _MIN_COMPRESS:
+            variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=11)
+            variants = {k: v for k, v in variants.items() if len(v) < len(body)}
+        return StaticFile(body, media_type, etag, cache_control, variants)
+
+    def get(self, name: str) -> StaticFile | None:
+        if self._files is None:
+            self.load()
+        return self._files.get(name)
+
+    def response(self, request: Request, name: str) -> Response | None:
+        """The cached file as a 200 or 304 response; None if it does not exist."""
+        entry = self.get(name)
+        if entry is None:
+            return None
+
+        # Each encoding is its own representation, so it gets its own strong ETag.
+        etags = {f'"{entry.etag}"'} | {f'"{entry.etag}-{c}"' for c in entry.variants}
+        coding = None
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        for candidate in ("br", "gzip"):
+            if candidate in entry.variants and candidate in accepted:
+                coding = candidate
+                break
+        headers = {
+            "ETag": f'"{entry.etag}-{coding}"' if coding else f'"{entry.etag}"',
+            "Cache-Control": entry.cache_control,
+        }
+        if entry.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etags):
+            return Response(status_code=304, headers=headers)
+        if coding:
+            headers["Content-Encoding"] = coding
+            return Response(entry.variants[coding], media_type=entry.media_type, headers=headers)
+        return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+    async def watch(self) -> None:
+        """Reload whenever something under root changes (STATIC_RELOAD)."""
+        try:
+            from watchfiles import awatch
+        except ImportError:
+            logger.warning("STATIC_RELOAD is set but watchfiles is not installed")
+            return
+        async for _ in awatch(self.root):
+            await asyncio.to_thread(self.load)
@@ -0,0 +1,505 @@
+"""Storage backends behind one protocol: SQLite (default) and in-memory.
+
+Callers go through ``get_storage()`` instead of importing ``database``
+functions directly, so the backend can be chosen at startup with the
+``STORAGE_BACKEND`` environment variable (``sqlite`` or ``memory``). The
+in-memory backend keeps the agent and tool hot paths benchmarkable and
+load-testable without disk I/O.
+"""
+
+import os
+import re
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Protocol
+
+from . import database
+from .availability import build_day, fmt_hhmm, parse_hhmm, service_duration
+from .database import (
+    MAX_SEARCH_DAYS,
+    decode_cursor,
+    encode_cursor,
+    parse_clinic_info,
+    parse_hours,
+    parse_services,
+    summarize_daily_stats,
+)
+
+
+class Storage(Protocol):
+    """Everything the app, tools and reminder job need from persistence."""
+
+    async def open(self) -> None: ...
+    async def close(self) -> None: ...
+
+    # Appointments
+    async def get_slots(self, date_str: str, service_type: str) -> list[str]: ...
+    async def find_next_available(
+        self, service_type: str, from_date: str, days: int = 7, limit: int = 5,
+    ) -> list[dict]: ...
+    async def create_appointment(
+        self, patient_name: str, patient_phone: str, patient_email: str,
+        service: str, date_str: str, time_str: str,
+    ) -> dict: ...
+    async def cancel_appointment(self, appointment_id: int, reason: str) -> bool: ...
+    async def get_patient_appointments(self, patient_name: str, patient_phone: str) -> list[dict]: ...
+    async def get_all_appointments(
+        self, date_filter: str | None = None, status_filter: str | None = None,
+        search: str | None = None,
+    ) -> list[dict]: ...
+    async def get_appointments_page(
+        self, date_filter: str | None = None, status_filter: str | None = None,
+        search: str | None = None, cursor: str | None = None, limit: int = 100,
+    ) -> dict: ...
+    def iter_appointments(
+        self, date_filter: str | None = None, status_filter: str | None = None,
+        search: str | None = None,
+    ) -> AsyncIterator[dict]: ...
+    async def get_stats_summary(self, from_date: str, to_date: str) -> dict: ...
+
+    # Settings
+    async def get_setting(self, key: str) -> str | None: ...
+    async def set_setting(self, key: str, value: str) -> None: ...
+    async def set_settings(self, values: dict[str, str]) -> None: ...
+    async def get_effective_clinic_info(self) -> dict: ...
+    async def get_effective_hours(self) -> dict: ...
+    async def get_effective_services(self) -> dict: ...
+
+    # Reminders
+    async def get_pending_24h_reminders(self) -> list[dict]: ...
+    async def mark_reminder_sent(self, appointment_id: int) -> None: ...
+
+    # Change tracking
+    async def data_version(self, name: str) -> int:
+        """Counter for 'appointments' or 'settings' that grows on every write."""
+
+
+# ---------------------------------------------------------------------------
+# Change notifications
+# ---------------------------------------------------------------------------
+# Caches derived from stored data subscribe here. Backends call
+# notify_change() after a successful write: ("appointments", date) when a
+# booking or cancellation changes that day, ("settings", None) on any
+# settings save. These are process-local; data_version() is the shared
+# counterpart for consumers that must see writes made by other workers.
+
+ChangeListener = Callable[[str, str | None], None]
+
+_listeners: list[ChangeListener] = []
+
+
+def add_change_listener(listener: ChangeListener) -> None:
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def notify_change(kind: str, date_str: str | None = None) -> None:
+    for listener in _listeners:
+        listener(kind, date_str)
+
+
+# ---------------------------------------------------------------------------
+# SQLite backend — thin delegation to database.py
+# ---------------------------------------------------------------------------
+
+class SQLiteStorage:
+    """The pooled aiosqlite implementation in database.py."""
+
+    async def open(self) -> None:
+        await database.open_pool()
+        await database.init_db()
+
+    async def close(self) -> None:
+        await database.close_pool()
+
+    async def get_slots(self, date_str, service_type):
+        return await database.get_slots(date_str, service_type)
+
+    async def find_next_available(self, service_type, from_date, days=7, limit=5):
+        return await database.find_next_available(service_type, from_date, days, limit)
+
+    async def create_appointment(self, patient_name, patient_phone, patient_email,
+                                 service, date_str, time_str):
+        result = await database.create_appointment(
+            patient_name, patient_phone, patient_email, service, date_str, time_str
+        )
+        if not result.get("conflict"):
+            notify_change("appointments", date_str)
+        return result
+
+    async def cancel_appointment(self, appointment_id, reason):
+        date_str = await database.cancel_appointment(appointment_id, reason)
+        if date_str is None:
+            return False
+        notify_change("appointments", date_str)
+        return True
+
+    async def get_patient_appointments(self, patient_name, patient_phone):
+        return await database.get_patient_appointments(patient_name, patient_phone)
+
+    async def get_all_appointments(self, date_filter=None, status_filter=None, search=None):
+        return await database.get_all_appointments(date_filter, status_filter, search)
+
+    async def get_appointments_page(self, date_filter=None, status_filter=None,
+                                    search=None, cursor=None, limit=100):
+        return await database.get_appointments_page(
+            date_filter, status_filter, search, cursor, limit
+        )
+
+    def iter_appointments(self, date_filter=None, status_filter=None, search=None):
+        return database.iter_appointments(date_filter, status_filter, search)
+
+    async def get_stats_summary(self, from_date, to_date):
+        return await database.get_stats_summary(from_date, to_date)
+
+    async def get_setting(self, key):
+        return await database.get_setting(key)
+
+    async def set_setting(self, key, value):
+        await database.set_setting(key, value)
+        notify_change("settings")
+
+    async def set_settings(self, values):
+        await database.set_settings(values)
+        notify_change("settings")
+
+    async def get_effective_clinic_info(self):
+        return await database.get_effective_clinic_info()
+
+    async def get_effective_hours(self):
+        return await database.get_effective_hours()
+
+    async def get_effective_services(self):
+        return await database.get_effective_services()
+
+    async def get_pending_24h_reminders(self):
+        return await database.get_pending_24h_reminders()
+
+    async def mark_reminder_sent(self, appointment_id):
+        await database.mark_reminder_sent(appointment_id)
+
+    async def data_version(self, name):
+        # Kept in the data_versions table by triggers, so every worker sees it.
+        return await database.get_data_version(name)
+
+
+# ---------------------------------------------------------------------------
+# In-memory backend
+# ---------------------------------------------------------------------------
+
+def _tokens(text: str) -> list[str]:
+    """Lower-cased, accent-stripped words (mirrors the FTS5 unicode61 tokenizer)."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return re.findall(r"\w+", folded)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class InMemoryStorage:
+    """Dict-backed storage with the same semantics as the SQLite backend.
+
+    Appointments are indexed by id, by patient and by date; each date keeps
+    a sorted list of (time, id) so slot checks and the admin listing order
+    never need a full scan. Nothing is persisted.
+    """
+
+    def __init__(self) -> None:
+        self._patients: dict[int, dict] = {}
+        self._by_phone: dict[str, int] = {}
+        self._appointments: dict[int, dict] = {}
+        self._by_date: dict[str, list[tuple[str, int]]] = {}
+        self._dates: list[str] = []                 # sorted keys of _by_date
+        self._by_patient: dict[int, list[int]] = defaultdict(list)
+        self._stats: dict[tuple[str, str, str], int] = defaultdict(int)
+        self._settings: dict[str, str] = {}
+        # Start from the clock so versions keep growing across restarts.
+        self._versions = dict.fromkeys(("appointments", "settings"), time.time_ns())
+        self._next_patient_id = 1
+        self._next_appointment_id = 1
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _confirmed_on(self, date_str: str) -> list[tuple[str, str]]:
+        return [
+            (t, self._appointments[i]["service"])
+            for t, i in self._by_date.get(date_str, ())
+            if self._appointments[i]["status"] == "confirmed"
+        ]
+
+    def _listing_row(self, apt: dict) -> dict:
+        p = self._patients[apt["patient_id"]]
+        return {
+            "id": apt["id"], "patient_name": p["name"], "phone": p["phone"],
+            "email": p["email"], "service": apt["service"], "date": apt["date"],
+            "time": apt["time"], "status": apt["status"], "created_at": apt["created_at"],
+        }
+
+    def _listing(self, date_filter, status_filter, search, after=None):
+        """Yield listing rows in (date DESC, time, id) order, after *after*."""
+        words = _tokens(search) if search else []
+        if search and not words:
+            return
+        dates = [date_filter] if date_filter else self._dates[::-1]
+        for d in dates:
+            entries = self._by_date.get(d, [])
+            start = 0
+            if after:
+                if d > after[0]:
+                    continue
+                if d == after[0]:
+                    start = bisect_right(entries, (after[1], after[2]))
+            for t, i in entries[start:]:
+                apt = self._appointments[i]
+                if status_filter and apt["status"] != status_filter:
+                    continue
+                if words and not self._patient_matches(apt["patient_id"], words):
+                    continue
+                yield self._listing_row(apt)
+
+    def _patient_matches(self, patient_id: int, words: list[str]) -> bool:
+        p = self._patients[patient_id]
+        tokens = p["tokens"]
+        return all(any(tok.startswith(w) for tok in tokens) for w in words)
+
+    # ------------------------------------------------------------------
+    # Appointments
+    # ------------------------------------------------------------------
+
+    async def get_slots(self, date_str, service_type):
+        hours = await self.get_effective_hours()
+        services = await self.get_effective_services()
+        try:
+            d = datetime.strptime(date_str, "%Y-%m-%d")
+        except ValueError:
+            return []
+        day = build_day(d.strftime("%A"), hours, services, self._confirmed_on(date_str))
+        return day.slots(service_duration(services, service_type)) if day else []
+
+    async def find_next_available(self, service_type, from_date, days=7, limit=5):
+        hours = await self.get_effective_hours()
+        services = await self.get_effective_services()
+        try:
+            start = datetime.strptime(from_date, "%Y-%m-%d").date()
+        except ValueError:
+            return []
+        days = max(1, min(days, MAX_SEARCH_DAYS))
+        duration = service_duration(services, service_type)
+        openings: list[dict] = []
+        for offset in range(days):
+            d = start + timedelta(days=offset)
+            date_str = d.isoformat()
+            day = build_day(d.strftime("%A"), hours, services, self._confirmed_on(date_str))
+            if day is None:
+                continue
+            for slot in day.slots(duration):
+                openings.append({"date": date_str, "time": slot})
+                if len(openings) >= limit:
+                    return openings
+        return openings
+
+    async def create_appointment(self, patient_name, patient_phone, patient_email,
+                                 service, date_str, time_str):
+        hours = await self.get_effective_hours()
+        services = await self.get_effective_services()
+        duration = service_duration(services, service)
+        try:
+            d = datetime.strptime(date_str, "%Y-%m-%d")
+            start = parse_hhmm(time_str)
+        except (ValueError, AttributeError):
+            return {"conflict": True, "reason": "invalid date or time", "available": []}
+
+        # No awaits from here on, so the check and insert are atomic.
+        day = build_day(d.strftime("%A"), hours, services, self._confirmed_on(date_str))
+        if day is None:
+            return {"conflict": True, "reason": "clinic closed", "available": []}
+        if not day.fits(start, duration):
+            return {"conflict": True, "reason": "slot unavailable",
+                    "available": day.slots(duration)}
+
+        patient_id = self._by_phone.get(patient_phone)
+        if patient_id is None:
+            patient_id = self._next_patient_id
+            self._next_patient_id += 1
+            self._patients[patient_id] = {
+                "id": patient_id, "name": patient_name, "phone": patient_phone,
+                "email": patient_email,
+                "tokens": _tokens(f"{patient_name} {patient_phone} {patient_email or ''}"),
+            }
+            self._by_phone[patient_phone] = patient_id
+
+        apt_id = self._next_appointment_id
+        self._next_appointment_id += 1
+        time_str = fmt_hhmm(start)
+        self._appointments[apt_id] = {
+            "id": apt_id, "patient_id": patient_id, "service": service,
+            "date": date_str, "time": time_str, "status": "confirmed", "reason": None,
+            "created_at": _now(), "reminder_24h_sent": 0,
+        }
+        if date_str not in self._by_date:
+            self._by_date[date_str] = []
+            insort(self._dates, date_str)
+        insort(self._by_date[date_str], (time_str, apt_id))
+        insort(self._by_patient[patient_id], apt_id)
+        self._stats[(date_str, service, "confirmed")] += 1
+        self._versions["appointments"] += 1
+        notify_change("appointments", date_str)
+        return {"id": apt_id, "patient_id": patient_id}
+
+    async def cancel_appointment(self, appointment_id, reason):
+        apt = self._appointments.get(appointment_id)
+        if apt is None or apt["status"] != "confirmed":
+            return False
+        apt["status"] = "cancelled"
+        apt["reason"] = reason
+        self._stats[(apt["date"], apt["service"], "confirmed")] -= 1
+        self._stats[(apt["date"], apt["service"], "cancelled")] += 1
+        self._versions["appointments"] += 1
+        notify_change("appointments", apt["date"])
+        return True
+
+    async def get_patient_appointments(self, patient_name, patient_phone):
+        patient_id = self._by_phone.get(patient_phone)
+        if patient_id is None:
+            return []
+        if patient_name.lower() not in self._patients[patient_id]["name"].lower():
+            return []
+        rows = [self._appointments[i] for i in self._by_patient[patient_id]]
+        rows.sort(key=lambda a: (a["date"], a["time"]))
+        return [
+            {k: a[k] for k in ("id", "service", "date", "time", "status")} for a in rows
+        ]
+
+    async def get_all_appointments(self, date_filter=None, status_filter=None, search=None):
+        return list(self._listing(date_filter, status_filter, search))
+
+    async def get_appointments_page(self, date_filter=None, status_filter=None,
+                                    search=None, cursor=None, limit=100):
+        after = decode_cursor(cursor) if cursor else None
+        items: list[dict] = []
+        more = False
+        for row in self._listing(date_filter, status_filter, search, after):
+            if len(items) == limit:
+                more = True
+                break
+            items.append(row)
+        return {"items": items, "next_cursor": encode_cursor(items[-1]) if more else None}
+
+    async def iter_appointments(self, date_filter=None, status_filter=None, search=None):
+        for row in self._listing(date_filter, status_filter, search):
+            yield row
+
+    async def get_stats_summary(self, from_date, to_date):
+        lo, hi = bisect_left(self._dates, from_date), bisect_right(self._dates, to_date)
+        wanted = set(self._dates[lo:hi])
+        rows = [
+            {"date": d, "service": svc, "status": st, "count": n}
+            for (d, svc, st), n in sorted(self._stats.items())
+            if n > 0 and d in wanted
+        ]
+        return summarize_daily_stats(
+            rows, from_date, to_date,
+            await self.get_effective_hours(), await self.get_effective_services(),
+        )
+
+    # ------------------------------------------------------------------
+    # Settings
+    # ------------------------------------------------------------------
+
+    async def get_setting(self, key):
+        return self._settings.get(key)
+
+    async def set_setting(self, key, value):
+        self._settings[key] = value
+        self._versions["settings"] += 1
+        notify_change("settings")
+
+    async def set_settings(self, values):
+        self._settings.update(values)
+        self._versions["settings"] += 1
+        notify_change("settings")
+
+    async def get_effective_clinic_info(self):
+        return parse_clinic_info(self._settings.get("clinic_info"))
+
+    async def get_effective_hours(self):
+        return parse_hours(self._settings.get("clinic_hours"))
+
+    async def get_effective_services(self):
+        return parse_services(self._settings.get("clinic_services"))
+
+    # ------------------------------------------------------------------
+    # Reminders
+    # ------------------------------------------------------------------
+
+    async def get_pending_24h_reminders(self):
+        # Same clock as SQLite's date('now', '+1 day'), i.e. UTC.
+        tomorrow = (datetime.now(timezone.utc).date() + timedelta(days=1)).isoformat()
+        rows = []
+        for _, i in self._by_date.get(tomorrow, ()):
+            apt = self._appointments[i]
+            if apt["status"] == "confirmed" and not apt["reminder_24h_sent"]:
+                p = self._patients[apt["patient_id"]]
+                rows.append({
+                    "id": apt["id"], "service": apt["service"], "date": apt["date"],
+                    "time": apt["time"], "name": p["name"], "phone": p["phone"],
+                    "email": p["email"],
+                })
+        return rows
+
+    async def mark_reminder_sent(self, appointment_id):
+        apt = self._appointments.get(appointment_id)
+        if apt is not None:
+            apt["reminder_24h_sent"] = 1
+
+    async def data_version(self, name):
+        return self._versions[name]
+
+
+# ---------------------------------------------------------------------------
+# Active backend
+# ---------------------------------------------------------------------------
+
+BACKENDS = {
+    "sqlite": SQLiteStorage,
+    "memory": InMemoryStorage,
+}
+
+_storage: Storage = SQLiteStorage()
+
+
+def get_storage() -> Storage:
+    """Return the active storage backend."""
+    return _storage
+
+
+def set_storage(storage: Storage) -> Storage:
+    """Replace the active backend (e.g. with a pre-populated InMemoryStorage)."""
+    global _storage
+    _storage = storage
+    return storage
+
+
+def configure_storage(name: str | None = None) -> Storage:
+    """Select the backend by name, defaulting to $STORAGE_BACKEND or 'sqlite'."""
+    name = (name or os.getenv("STORAGE_BACKEND", "sqlite")).lower()
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown STORAGE_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}"
+        ) from None
+    return set_storage(backend())
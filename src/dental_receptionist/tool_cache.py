@@ -0,0 +1,91 @@
+"""Shared LRU + TTL cache for read-only tool results.
+
+Entries are keyed by tool name and normalized arguments and carry tags
+(e.g. ``date:2026-03-02``). Storage writes invalidate precisely: a booking
+or cancellation drops only the entries tagged with its date, and a settings
+save clears everything. An epoch counter guards against a result computed
+before an invalidation being stored after it.
+"""
+
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Hashable
+
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "60"))   # seconds
+
+
+class ToolCache:
+    def __init__(self, maxsize: int = TOOL_CACHE_SIZE, ttl: float = TOOL_CACHE_TTL) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.epoch = 0
+        self._entries: OrderedDict[Hashable, tuple[float, str, frozenset[str]]] = OrderedDict()
+        self._tagged: dict[str, set[Hashable]] = defaultdict(set)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() > entry[0]:
+            if entry is not None:
+                self._discard(key)
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: str, tags=(), epoch: int | None = None) -> None:
+        """Store *value* unless something was invalidated since *epoch* was read."""
+        if self.maxsize <= 0 or (epoch is not None and epoch != self.epoch):
+            return
+        self._discard(key)
+        tags = frozenset(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._tagged[tag].add(key)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Drop every entry carrying *tag*. Returns how many were dropped."""
+        self.epoch += 1
+        keys = self._tagged.pop(tag, set())
+        for key in keys:
+            self._discard(key)
+        self._stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self._stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+        self._tagged.clear()
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def date_tag(date_str: str) -> str:
+    return f"date:{date_str}"
@@ -1,17 +1,14 @@
 """Tool schemas and async implementations for the Claude agentic loop."""
 
 import asyncio
+import json
+from datetime import date as _date, datetime, timedelta
 
 from .config import FAQ, SERVICES as _CONFIG_SERVICES
-from .database import (
-    get_slots,
-    create_appointment as db_create_appointment,
-    cancel_appointment as db_cancel_appointment,
-    get_patient_appointments as db_get_patient_appointments,
-    get_effective_clinic_info,
-    get_effective_hours,
-    get_effective_services,
-)
+from .database import MAX_SEARCH_DAYS
+from .metrics import CallbackMetric
+from .storage import add_change_listener, get_storage
+from .tool_cache import ToolCache, date_tag
 
 # ---------------------------------------------------------------------------
 # Tool schemas (passed to Claude's `tools` parameter)
@@ -40,6 +37,37 @@ TOOLS: list[dict] = [
             "required": ["date", "service_type"],
         },
     },
+    {
+        "name": "find_next_available",
+        "description": (
+            "Find the earliest open appointment slots for a service across several days "
+            "in one call. Use this for questions like 'what's your next opening?' or "
+            "'earliest cleaning next week' instead of checking dates one at a time."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "service_type": {
+                    "type": "string",
+                    "description": "Type of dental service to book",
+                    "enum": list(_CONFIG_SERVICES.keys()),
+                },
+                "from_date": {
+                    "type": "string",
+                    "description": "First date to search, YYYY-MM-DD (defaults to today)",
+                },
+                "days": {
+                    "type": "integer",
+                    "description": "Number of days to search, starting at from_date (default 7, max 60)",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of slots to return (default 5)",
+                },
+            },
+            "required": ["service_type"],
+        },
+    },
     {
         "name": "schedule_appointment",
         "description": "Book a confirmed dental appointment for a patient.",
@@ -128,8 +156,8 @@ def _fmt_time(t: str) -> str:
 # ---------------------------------------------------------------------------
 
 async def _check_availability(date: str, service_type: str) -> str:
-    slots = await get_slots(date, service_type)
-    services = await get_effective_services()
+    slots = await get_storage().get_slots(date, service_type)
+    services = await get_storage().get_effective_services()
     svc = services.get(service_type, {})
     name = svc.get("name", service_type)
     dur = svc.get("duration_min", 60)
@@ -142,6 +170,33 @@ async def _check_availability(date: str, service_type: str) -> str:
     return f"Available slots for {name} ({dur} min) on {date}:\n{formatted}"
 
 
+async def _find_next_available(
+    service_type: str,
+    from_date: str | None = None,
+    days: int = 7,
+    limit: int = 5,
+) -> str:
+    from_date = from_date or _date.today().isoformat()
+    openings = await get_storage().find_next_available(service_type, from_date, days, limit)
+    services = await get_storage().get_effective_services()
+    svc = services.get(service_type, {})
+    name = svc.get("name", service_type)
+    dur = svc.get("duration_min", 60)
+    if not openings:
+        return (
+            f"No available slots for {name} in the {days} day(s) from {from_date}. "
+            "Try a later start date or a longer search window."
+        )
+    by_date: dict[str, list[str]] = {}
+    for o in openings:
+        by_date.setdefault(o["date"], []).append(_fmt_time(o["time"]))
+    lines = [f"Next available slots for {name} ({dur} min):"]
+    for d, times in by_date.items():
+        day_name = datetime.strptime(d, "%Y-%m-%d").strftime("%A")
+        lines.append(f"  • {day_name} {d}: {', '.join(times)}")
+    return "\n".join(lines)
+
+
 async def _schedule_appointment(
     patient_name: str,
     patient_phone: str,
@@ -150,45 +205,51 @@ async def _schedule_appointment(
     date: str,
     time: str,
 ) -> str:
-    try:
-        result = await db_create_appointment(
-            patient_name, patient_phone, patient_email, service_type, date, time
-        )
-        services = await get_effective_services()
-        svc_name = services.get(service_type, {}).get("name", service_type)
-
-        # Send WhatsApp confirmation (runs in thread to avoid blocking the event loop)
-        from .whatsapp import send_booking_confirmation
-        import asyncio
-        await asyncio.get_event_loop().run_in_executor(
-            None,
-            send_booking_confirmation,
-            patient_name,
-            patient_phone,
-            svc_name,
-            date,
-            _fmt_time(time),
-            result["id"],
-            patient_email,
-        )
+    # Errors propagate so _run_tool flags the result is_error (and escalates).
+    result = await get_storage().create_appointment(
+        patient_name, patient_phone, patient_email, service_type, date, time
+    )
+    services = await get_storage().get_effective_services()
+    svc_name = services.get(service_type, {}).get("name", service_type)
 
+    if result.get("conflict"):
+        open_times = ", ".join(_fmt_time(s) for s in result["available"])
         return (
-            f"Appointment confirmed!\n"
-            f"  Appointment ID : #{result['id']}\n"
-            f"  Patient        : {patient_name}\n"
-            f"  Service        : {svc_name}\n"
-            f"  Date           : {date}\n"
-            f"  Time           : {_fmt_time(time)}\n"
-            f"  Phone          : {patient_phone}\n\n"
-            f"Reminder: 24-hour cancellation notice is required to avoid a fee.\n"
-            f"A confirmation email has been sent to {patient_email}."
+            f"Could not book {svc_name} on {date} at {time}: {result['reason']}.\n"
+            + (f"Open times that day: {open_times}" if open_times
+               else "There are no open times that day — try another date.")
         )
-    except Exception as exc:
-        return f"Failed to schedule appointment: {exc}"
+
+    # Send WhatsApp confirmation (runs in thread to avoid blocking the event loop)
+    from .whatsapp import send_booking_confirmation
+    import asyncio
+    await asyncio.get_event_loop().run_in_executor(
+        None,
+        send_booking_confirmation,
+        patient_name,
+        patient_phone,
+        svc_name,
+        date,
+        _fmt_time(time),
+        result["id"],
+        patient_email,
+    )
+
+    return (
+        f"Appointment confirmed!\n"
+        f"  Appointment ID : #{result['id']}\n"
+        f"  Patient        : {patient_name}\n"
+        f"  Service        : {svc_name}\n"
+        f"  Date           : {date}\n"
+        f"  Time           : {_fmt_time(time)}\n"
+        f"  Phone          : {patient_phone}\n\n"
+        f"Reminder: 24-hour cancellation notice is required to avoid a fee.\n"
+        f"A confirmation email has been sent to {patient_email}."
+    )
 
 
 async def _cancel_appointment(appointment_id: int, reason: str) -> str:
-    success = await db_cancel_appointment(appointment_id, reason)
+    success = await get_storage().cancel_appointment(appointment_id, reason)
     if success:
         return (
             f"Appointment #{appointment_id} has been successfully cancelled.\n"
@@ -201,10 +262,10 @@ async def _cancel_appointment(appointment_id: int, reason: str) -> str:
 
 
 async def _get_patient_appointments(patient_name: str, patient_phone: str) -> str:
-    rows = await db_get_patient_appointments(patient_name, patient_phone)
+    rows = await get_storage().get_patient_appointments(patient_name, patient_phone)
     if not rows:
         return f"No appointments found for {patient_name} (phone: {patient_phone})."
-    services = await get_effective_services()
+    services = await get_storage().get_effective_services()
     lines = [f"Appointments for {patient_name}:"]
     for apt in rows:
         svc_name = services.get(apt["service"], {}).get("name", apt["service"])
@@ -217,9 +278,9 @@ async def _get_patient_appointments(patient_name: str, patient_phone: str) -> st
 
 async def _get_clinic_info(topic: str) -> str:
     t = topic.lower()
-    info = await get_effective_clinic_info()
-    hours = await get_effective_hours()
-    services = await get_effective_services()
+    info = await get_storage().get_effective_clinic_info()
+    hours = await get_storage().get_effective_hours()
+    services = await get_storage().get_effective_services()
 
     if any(w in t for w in ("hour", "open", "close", "schedule", "time")):
         lines = [f"{info['name']} — Office Hours:"]
@@ -255,14 +316,101 @@ async def _get_clinic_info(topic: str) -> str:
     )
 
 
+# ---------------------------------------------------------------------------
+# Result cache for read-only tools
+# ---------------------------------------------------------------------------
+# Shared across sessions. Bookings/cancellations drop the entries for their
+# date and settings saves drop everything (see storage.notify_change). The
+# cache is per process, so with several workers a write elsewhere is only
+# seen after TOOL_CACHE_TTL; create_appointment re-checks the slot anyway.
+
+tool_cache = ToolCache()
+
+
+def _availability_args(date: str, service_type: str) -> dict:
+    return {"date": date.strip(), "service_type": service_type}
+
+
+def _window_args(
+    service_type: str, from_date: str | None = None, days: int = 7, limit: int = 5
+) -> dict:
+    return {
+        "service_type": service_type,
+        "from_date": (from_date or _date.today().isoformat()).strip(),
+        "days": int(days),
+        "limit": int(limit),
+    }
+
+
+def _window_tags(args: dict) -> list[str]:
+    try:
+        start = _date.fromisoformat(args["from_date"])
+    except ValueError:
+        return []
+    # Same clamp as database.find_next_available, which always searches >= 1 day
+    days = max(1, min(args["days"], MAX_SEARCH_DAYS))
+    return [date_tag((start + timedelta(days=i)).isoformat()) for i in range(days)]
+
+
+def _cached(name: str, handler, normalize, tags=lambda args: ()):
+    """Wrap *handler* so results are served from tool_cache when fresh."""
+    async def cached(**kwargs) -> str:
+        args = normalize(**kwargs)
+        key = (name, json.dumps(args, sort_keys=True))
+        result = tool_cache.get(key)
+        if result is None:
+            epoch = tool_cache.epoch
+            result = await handler(**args)
+            tool_cache.put(key, result, tags(args), epoch)
+        return result
+    return cached
+
+
+def _invalidate_tool_cache(kind: str, date_str: str | None) -> None:
+    if kind == "appointments" and date_str:
+        tool_cache.invalidate_tag(date_tag(date_str))
+    else:
+        tool_cache.clear()
+
+
+add_change_listener(_invalidate_tool_cache)
+
+CallbackMetric(
+    "tool_cache_events_total", "Tool result cache lookups and removals, by event.",
+    lambda: {(k,): v for k, v in tool_cache.stats().items()
+             if k in ("hits", "misses", "evictions", "invalidations")},
+    ("event",), kind="counter",
+)
+CallbackMetric("tool_cache_entries", "Entries in the tool result cache.",
+               lambda: {(): len(tool_cache)})
+
+
 # ---------------------------------------------------------------------------
 # Registry: tool name → async callable
 # ---------------------------------------------------------------------------
 
 TOOL_HANDLERS: dict = {
-    "check_availability":     _check_availability,
+    "check_availability": _cached(
+        "check_availability", _check_availability, _availability_args,
+        lambda args: [date_tag(args["date"])],
+    ),
+    "find_next_available": _cached(
+        "find_next_available", _find_next_available, _window_args, _window_tags,
+    ),
     "schedule_appointment":   _schedule_appointment,
     "cancel_appointment":     _cancel_appointment,
     "get_patient_appointments": _get_patient_appointments,
-    "get_clinic_info":        _get_clinic_info,
+    "get_clinic_info": _cached(
+        "get_clinic_info", _get_clinic_info,
+        lambda topic: {"topic": topic.strip().lower()},
+    ),
 }
+
+# Read-only tools that may run concurrently within one model turn. Anything
+# not listed here (bookings, cancellations) runs on its own, in order.
+PARALLEL_SAFE_TOOLS: frozenset[str] = frozenset({
+    "check_availability",
+    "find_next_available",
+    "get_patient_appointments",
+    "get_clinic_info",
+})
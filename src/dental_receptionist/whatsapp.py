@@ -3,9 +3,12 @@
 import logging
 import os
 import smtplib
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
+from .metrics import SMTP_SEND_SECONDS
+
 logger = logging.getLogger(__name__)
 
 
@@ -115,14 +118,17 @@ def send_booking_confirmation(
     msg.attach(MIMEText(text_body, "plain"))
     msg.attach(MIMEText(html_body, "html"))
 
+    started = time.perf_counter()
     try:
         with smtplib.SMTP(smtp_host, smtp_port) as server:
             server.ehlo()
             server.starttls()
             server.login(sender, password)
             server.sendmail(sender, recipient, msg.as_string())
+        SMTP_SEND_SECONDS.observe(time.perf_counter() - started, outcome="sent")
         logger.info("Booking confirmation email sent to %s (ID #%s)", recipient, appointment_id)
         return True
     except Exception:
+        SMTP_SEND_SECONDS.observe(time.perf_counter() - started, outcome="error")
         logger.exception("Failed to send booking confirmation email to %s", recipient)
         return False
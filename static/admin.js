@@ -1,27 +1,55 @@
 /* ── Auth helpers ────────────────────────────────────────── */
+// The password is only sent to /api/admin/login (and change-password);
+// other calls use the short-lived session token it returns, which is
+// renewed through /api/admin/refresh at half its lifetime.
 function getAuthHeader() {
-  const stored = sessionStorage.getItem("adminAuth");
-  return stored ? { "Authorization": "Basic " + stored } : {};
+  const token = sessionStorage.getItem("adminToken");
+  return token ? { "Authorization": "Bearer " + token } : {};
 }
 
-function saveCredentials(user, pass) {
-  sessionStorage.setItem("adminAuth", btoa(user + ":" + pass));
+function basicAuth(user, pass) {
+  return { "Authorization": "Basic " + btoa(user + ":" + pass) };
+}
+
+function saveSession(user, token, expiresIn) {
+  sessionStorage.setItem("adminUser", user);
+  sessionStorage.setItem("adminToken", token);
+  clearTimeout(tokenTimer);
+  tokenTimer = setTimeout(refreshToken, expiresIn * 500);
 }
 
 function clearCredentials() {
-  sessionStorage.removeItem("adminAuth");
+  clearTimeout(tokenTimer);
+  sessionStorage.removeItem("adminUser");
+  sessionStorage.removeItem("adminToken");
+}
+
+async function refreshToken() {
+  try {
+    const res = await fetch("/api/admin/refresh", { method: "POST", headers: getAuthHeader() });
+    if (res.status === 401) { promptLogin(); return; }
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    const data = await res.json();
+    saveSession(sessionStorage.getItem("adminUser") || "admin", data.token, data.expires_in);
+  } catch (err) {
+    console.error("Token refresh failed:", err);
+    clearTimeout(tokenTimer);
+    tokenTimer = setTimeout(refreshToken, 60_000);
+  }
 }
 
 /* ── State ───────────────────────────────────────────────── */
 let allAppointments = [];
 let pendingCancelId = null;
 let refreshTimer    = null;
+let tokenTimer      = null;
 
 /* ── Boot ────────────────────────────────────────────────── */
 document.addEventListener("DOMContentLoaded", () => {
-  if (sessionStorage.getItem("adminAuth")) {
+  if (sessionStorage.getItem("adminToken")) {
     showDashboard();
     loadAppointments();
+    refreshToken();   // unknown age after a reload; renew now
   }
 
   document.getElementById("loginForm").addEventListener("submit", handleLogin);
@@ -60,16 +88,21 @@ async function handleLogin(e) {
   const pass = document.getElementById("loginPass").value;
   const errEl = document.getElementById("loginError");
 
-  saveCredentials(user, pass);
-
   try {
-    const res = await fetch("/api/appointments", { headers: getAuthHeader() });
-    if (res.status === 401) {
+    const login = await fetch("/api/admin/login", { method: "POST", headers: basicAuth(user, pass) });
+    if (login.status === 401) {
       clearCredentials();
       errEl.textContent = "Invalid username or password.";
       errEl.hidden = false;
       return;
     }
+    if (!login.ok) {
+      throw new Error(`Server error: ${login.status}`);
+    }
+    const session = await login.json();
+    saveSession(user, session.token, session.expires_in);
+
+    const res = await fetch("/api/appointments", { headers: getAuthHeader() });
     if (!res.ok) {
       throw new Error(`Server error: ${res.status}`);
     }
@@ -88,6 +121,20 @@ async function handleLogin(e) {
   }
 }
 
+// Session expired or revoked: ask for the password again on top of the
+// dashboard, so open tabs, filters and unsaved settings are kept.
+function promptLogin() {
+  const user = sessionStorage.getItem("adminUser") || "";
+  clearCredentials();
+  clearInterval(refreshTimer);
+  document.getElementById("loginUser").value = user;
+  document.getElementById("loginPass").value = "";
+  const errEl = document.getElementById("loginError");
+  errEl.textContent = "Your session has expired. Please sign in again.";
+  errEl.hidden = false;
+  document.getElementById("loginOverlay").hidden = false;
+}
+
 function handleLogout() {
   clearCredentials();
   clearInterval(refreshTimer);
@@ -116,7 +163,7 @@ function switchTab(name) {
 /* ── Load appointments from API ──────────────────────────── */
 async function loadAppointments() {
   const res = await fetch("/api/appointments", { headers: getAuthHeader() });
-  if (res.status === 401) { handleLogout(); return; }
+  if (res.status === 401) { promptLogin(); return; }
   allAppointments = await res.json();
   updateStats();
   renderTable();
@@ -210,6 +257,7 @@ async function confirmCancel() {
     body: JSON.stringify({ reason }),
   });
   closeModal();
+  if (res.status === 401) { promptLogin(); return; }
   if (res.ok) {
     await loadAppointments();
   } else {
@@ -264,7 +312,7 @@ function esc(str) {
 /* ── Settings: load ──────────────────────────────────────── */
 async function loadSettings() {
   const res = await fetch("/api/settings", { headers: getAuthHeader() });
-  if (res.status === 401) { handleLogout(); return; }
+  if (res.status === 401) { promptLogin(); return; }
   const { info, hours, services } = await res.json();
 
   // Clinic info
@@ -311,7 +359,7 @@ async function saveInfo() {
     headers: { "Content-Type": "application/json", ...getAuthHeader() },
     body: JSON.stringify({ info }),
   });
-  if (res.status === 401) { handleLogout(); return; }
+  if (res.status === 401) { promptLogin(); return; }
   if (res.ok) showFeedback("infoFeedback");
 }
 
@@ -326,7 +374,7 @@ async function saveHours() {
     headers: { "Content-Type": "application/json", ...getAuthHeader() },
     body: JSON.stringify({ hours }),
   });
-  if (res.status === 401) { handleLogout(); return; }
+  if (res.status === 401) { promptLogin(); return; }
   if (res.ok) showFeedback("hoursFeedback");
 }
 
@@ -343,7 +391,7 @@ async function saveServices() {
     headers: { "Content-Type": "application/json", ...getAuthHeader() },
     body: JSON.stringify({ services }),
   });
-  if (res.status === 401) { handleLogout(); return; }
+  if (res.status === 401) { promptLogin(); return; }
   if (res.ok) showFeedback("svcFeedback");
 }
 
@@ -374,13 +422,12 @@ async function submitChangePassword2() {
     return;
   }
 
-  const storedUser = atob(sessionStorage.getItem("adminAuth") || "").split(":")[0] || "admin";
-  const tempAuth = "Basic " + btoa(storedUser + ":" + current);
+  const storedUser = sessionStorage.getItem("adminUser") || "admin";
 
   try {
     const res = await fetch("/api/admin/change-password", {
       method: "POST",
-      headers: { "Content-Type": "application/json", "Authorization": tempAuth },
+      headers: { "Content-Type": "application/json", ...basicAuth(storedUser, current) },
       body: JSON.stringify({ new_password: newPass, confirm_password: confirm }),
     });
 
@@ -396,7 +443,9 @@ async function submitChangePassword2() {
       return;
     }
 
-    saveCredentials(storedUser, newPass);
+    // The password change revoked the old token; switch to the new one
+    const data = await res.json();
+    saveSession(storedUser, data.token, data.expires_in);
     okEl.hidden = false;
     document.getElementById("cpCurrent").value = "";
     document.getElementById("cpNew").value     = "";
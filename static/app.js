@@ -22,6 +22,8 @@ let selectedLang     = "en";
 let mediaRecorder    = null;
 let audioChunks      = [];
 let activeStream     = null;
+let recordingStarted = 0;
+let queuedVoice      = null;   // recording made while a reply was streaming
 
 /* ── Boot ────────────────────────────────────────────────── */
 document.addEventListener("DOMContentLoaded", async () => {
@@ -112,10 +114,11 @@ async function startListening() {
     });
     mediaRecorder.addEventListener("stop", () => {
       const blob = new Blob(audioChunks, { type: "audio/webm" });
-      transcribeAudio(blob);
+      sendVoice(blob, (Date.now() - recordingStarted) / 1000);
     });
 
     mediaRecorder.start();
+    recordingStarted = Date.now();
     isListening = true;
     document.getElementById("micBtn").classList.add("recording");
     showVoiceBar("Listening…");
@@ -138,27 +141,29 @@ function stopListening() {
   document.getElementById("micBtn").classList.remove("recording");
 }
 
-async function transcribeAudio(blob) {
+// One round trip: /voice transcribes the audio and streams the reply, opening
+// with a "transcript" event that becomes the user bubble.
+async function sendVoice(blob, duration) {
+  if (isStreaming) {
+    queuedVoice = { blob, duration };
+    showVoiceBar("Voice message will be sent after this reply…");
+    return;
+  }
+  speechSynthesis.cancel();
   showVoiceBar("Processing…");
-  try {
-    const form = new FormData();
-    form.append("audio", blob, "recording.webm");
-    form.append("language", selectedLang);
-
-    const res = await fetch("/transcribe", { method: "POST", body: form });
-    if (!res.ok) throw new Error(`HTTP ${res.status}`);
 
-    const { text } = await res.json();
-    hideVoiceBar();
+  const form = new FormData();
+  form.append("audio", blob, "recording.webm");
+  form.append("session_id", sessionId);
+  form.append("language", selectedLang);
+  form.append("duration", duration.toFixed(1));
 
-    if (text && text.trim()) {
-      document.getElementById("messageInput").value = text;
-      sendMessage();
-    }
-  } catch (err) {
+  await streamReply(async () => {
+    const res = await fetch("/voice", { method: "POST", body: form });
     hideVoiceBar();
-    console.error("Transcription error:", err);
-  }
+    return res;
+  });
+  hideVoiceBar();
 }
 
 /* ── TTS ─────────────────────────────────────────────────── */
@@ -197,6 +202,15 @@ async function sendMessage() {
   input.value = "";
   input.style.height = "auto";
 
+  await streamReply(() => fetch("/chat", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ session_id: sessionId, message: text }),
+  }));
+}
+
+/* ── Stream a reply (shared by /chat and /voice) ─────────── */
+async function streamReply(request) {
   // Lock UI
   isStreaming = true;
   setInputDisabled(true);
@@ -209,15 +223,11 @@ async function sendMessage() {
   let accText   = "";
 
   try {
-    const res = await fetch("/chat", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ session_id: sessionId, message: text }),
-    });
+    const res = await request();
 
     if (!res.ok) {
       const err = await res.json().catch(() => ({}));
-      throw new Error(err.error || `HTTP ${res.status}`);
+      throw new Error(err.error || err.detail || `HTTP ${res.status}`);
     }
 
     const reader  = res.body.getReader();
@@ -238,7 +248,14 @@ async function sendMessage() {
         try { payload = JSON.parse(line.slice(6)); }
         catch { continue; }
 
-        if (payload.type === "text") {
+        if (payload.type === "transcript") {
+          if (payload.text) {
+            appendUserBubble(payload.text);
+            // keep the typing indicator below the new user bubble
+            if (typingRow.parentNode) typingRow.parentNode.appendChild(typingRow);
+          }
+
+        } else if (payload.type === "text") {
           if (typingRow && typingRow.parentNode) typingRow.remove();
           if (!botBubble) botBubble = createBotBubble();
           accText += payload.chunk;
@@ -276,6 +293,13 @@ async function sendMessage() {
   setInputDisabled(false);
   document.getElementById("messageInput").focus();
   scrollToBottom();
+
+  if (queuedVoice) {
+    const { blob, duration } = queuedVoice;
+    queuedVoice = null;
+    // Next task, so the finishing sendVoice() can't hide the new voice bar
+    setTimeout(() => sendVoice(blob, duration), 0);
+  }
 }
 
 /* ── DOM helpers ─────────────────────────────────────────── */